@@ -0,0 +1,32 @@
+"""告警 API 路由"""
+from typing import Optional
+from fastapi import APIRouter, Query
+from app.models import Alert, AlertRule, AlertState
+from app.services.alerts import alert_service
+
+router = APIRouter(prefix="/api/alerts", tags=["alerts"])
+
+@router.get("", response_model=list[Alert])
+async def list_alerts(
+    state: AlertState = Query(AlertState.FIRING, description="firing: 触发中; resolved: 最近恢复"),
+    server_id: Optional[str] = Query(None, description="服务器ID"),
+    severity: Optional[str] = Query(None, description="级别")
+):
+    """获取告警列表"""
+    alerts = alert_service.active() if state == AlertState.FIRING else alert_service.resolved()
+    return [
+        alert for alert in alerts
+        if (server_id is None or alert.server_id == server_id)
+        and (severity is None or alert.severity == severity)
+    ]
+
+@router.get("/rules", response_model=list[AlertRule])
+async def list_rules():
+    """获取告警规则"""
+    return alert_service.rules
+
+@router.post("/reload")
+async def reload_rules():
+    """重新加载告警配置文件"""
+    count = alert_service.load_config()
+    return {"message": "Alert rules reloaded", "count": count}
@@ -0,0 +1,49 @@
+"""跨服务器通道查询 API 路由"""
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+from pydantic_core import to_json
+from app.models import ChannelState, ChannelSortKey, ServerChannelInfo
+from app.services.poller import poller_service
+
+router = APIRouter(prefix="/api/channels", tags=["channels"])
+
+@router.get("", response_model=list[ServerChannelInfo])
+async def find_channels(
+    server_id: Optional[str] = Query(None, description="限定服务器"),
+    state: Optional[ChannelState] = Query(None, description="通道状态"),
+    fps_lt: Optional[float] = Query(None, description="帧率低于"),
+    fps_gte: Optional[float] = Query(None, description="帧率不低于"),
+    bitrate_lt: Optional[int] = Query(None, description="码率低于 (Kbps)"),
+    bitrate_gte: Optional[int] = Query(None, description="码率不低于 (Kbps)"),
+    online_only: bool = Query(True, description="仅在线服务器"),
+    sort: ChannelSortKey = Query(ChannelSortKey.SERVER, description="排序字段"),
+    desc: bool = Query(False, description="降序"),
+    limit: Optional[int] = Query(None, ge=1, description="最多返回条数")
+):
+    """按帧率/码率/状态筛选和排序全集群通道，如: ?state=running&fps_lt=25&sort=fps"""
+    if server_id and not poller_service.get_server(server_id):
+        raise HTTPException(status_code=404, detail="Server not found")
+    matches = poller_service.find_channels(
+        server_id=server_id, state=state,
+        fps_lt=fps_lt, fps_gte=fps_gte,
+        bitrate_lt=bitrate_lt, bitrate_gte=bitrate_gte,
+        online_only=online_only
+    )
+    if sort != ChannelSortKey.SERVER:
+        key = sort.value
+        # 指标缺失的通道始终排在最后
+        present = [m for m in matches if getattr(m[1], key) is not None]
+        missing = [m for m in matches if getattr(m[1], key) is None]
+        present.sort(key=lambda m: getattr(m[1], key), reverse=desc)
+        matches = present + missing
+    elif desc:
+        matches.reverse()
+    if limit is not None:
+        matches = matches[:limit]
+    # 直接编码通道字典（与 ServerChannelInfo 序列化结果一致），不为每个结果构造模型
+    body = to_json([
+        {**channel.to_json(), "server_id": config.id, "server_name": config.name}
+        for config, channel in matches
+    ])
+    return Response(body, media_type="application/json")
@@ -0,0 +1,15 @@
+"""全集群统计 API 路由"""
+from fastapi import APIRouter, Query
+from fastapi.responses import Response
+from app.models import ClusterStatsResponse
+from app.services.poller import poller_service
+
+router = APIRouter(prefix="/api/cluster", tags=["cluster"])
+
+@router.get("/stats", response_model=ClusterStatsResponse)
+async def get_cluster_stats(
+    top: int = Query(10, ge=1, le=100, description="返回 CPU 最高的服务器数")
+):
+    """全集群统计：各状态服务器数、各状态通道数、码率、所有核心 CPU 分位数与最热服务器"""
+    cached = poller_service.stats_json(top)
+    return Response(cached.body, media_type="application/json", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,28 @@
+"""诊断 API 路由：慢操作追踪与事件循环采样分析"""
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.models import ProfileResult, TraceInfo
+from app.services.profiler import profiler_service
+from app.services.tracing import tracing_service
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+@router.get("/traces", response_model=list[TraceInfo])
+async def list_traces(
+    name: Optional[str] = Query(None, description="操作名称，如 poll、channel_restart"),
+    min_ms: Optional[float] = Query(None, ge=0, description="最小耗时(毫秒)"),
+    limit: int = Query(50, ge=1, le=1000, description="最多返回条数（取最近的）")
+):
+    """最近的慢操作及其各阶段耗时（新的在前；未启用追踪时为空）"""
+    return tracing_service.slow_traces(name=name, min_ms=min_ms, limit=limit)
+
+@router.post("/profile", response_model=ProfileResult)
+async def run_profile(
+    seconds: float = Query(5.0, gt=0, description="采样时长(秒)，不超过 profiler_max_seconds")
+):
+    """对处理该请求的进程的事件循环采样分析，完成后返回结果"""
+    if not profiler_service.enabled:
+        raise HTTPException(status_code=403, detail="Profiler disabled")
+    if profiler_service.running:
+        raise HTTPException(status_code=409, detail="Profile already running")
+    return await profiler_service.profile(seconds)
@@ -0,0 +1,75 @@
+"""事件日志 API 路由"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.models import EventType, JournalEvent
+from app.services.journal import journal_service
+from app.services.stream import stream_service
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+def _local_time(value: Optional[datetime]) -> Optional[datetime]:
+    """带时区的时间转换为本地时间（事件时间为不带时区的本地时间）"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+@router.get("", response_model=list[JournalEvent], response_model_exclude_none=True)
+async def list_events(
+    server_id: Optional[str] = Query(None, description="服务器ID"),
+    channel_id: Optional[int] = Query(None, ge=1, description="通道编号"),
+    type_: Optional[list[EventType]] = Query(None, alias="type", description="事件类型，可多选"),
+    start: Optional[datetime] = Query(None, description="起始时间，默认 24 小时前"),
+    end: Optional[datetime] = Query(None, description="结束时间（不含）"),
+    limit: int = Query(1000, ge=1, le=10000, description="最多返回条数（取最近的）")
+):
+    """查询状态变化事件，按时间升序"""
+    start, end = _local_time(start), _local_time(end)
+    if start is None:
+        start = datetime.now() - timedelta(days=1)
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    return await journal_service.query(
+        start, end, server_id=server_id, channel_id=channel_id, types=type_, limit=limit
+    )
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    server_id: Optional[str] = Query(None, description="服务器ID"),
+    channel_id: Optional[int] = Query(None, ge=1, description="通道编号"),
+    type_: Optional[list[EventType]] = Query(None, alias="type", description="事件类型，可多选")
+):
+    """实时事件推送 (SSE)：只推送连接之后发生且满足条件的事件"""
+    sub = journal_service.subscribe()
+
+    async def event_generator():
+        try:
+            while not (sub.closed and sub.queue.empty()):
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(
+                        sub.queue.get(), timeout=settings.stream_heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    break
+                if ((server_id is not None and event.server_id != server_id)
+                        or (channel_id is not None and event.channel_id != channel_id)
+                        or (type_ and event.type not in type_)):
+                    continue
+                yield stream_service.encode_raw("event", event.model_dump_json(exclude_none=True))
+        finally:
+            journal_service.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,37 @@
+"""批量通道操作任务 API 路由"""
+from fastapi import APIRouter, HTTPException
+from app.models import BulkActionRequest, JobInfo
+from app.services.jobs import job_service
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+@router.post("", response_model=JobInfo, status_code=202)
+async def create_job(request: BulkActionRequest):
+    """提交批量/滚动通道操作，立即返回任务ID；进度可查询或通过 /api/servers/stream 的 job 事件订阅"""
+    try:
+        return job_service.submit(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("", response_model=list[JobInfo])
+async def list_jobs():
+    """获取最近的任务列表"""
+    return job_service.list_jobs()
+
+@router.get("/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str):
+    """获取任务进度及各通道结果"""
+    job = job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/{job_id}/cancel", response_model=JobInfo)
+async def cancel_job(job_id: str):
+    """取消运行中的任务"""
+    job = job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job_service.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {job.state.value}")
+    return job
@@ -1,28 +1,200 @@
 """服务器管理 API 路由"""
-from fastapi import APIRouter, HTTPException, Path
-from app.models import ServerResponse, ChannelActionResult
+import asyncio
+import re
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from app.config import settings
+from app.models import (
+    ServerResponse, ServerState, ServerStatus, ServerSortKey, ChannelState,
+    ChannelActionResult, HistoryMetric, HistoryResponse
+)
+from app.services.history import history_service
 from app.services.poller import poller_service
 from app.services.manager import manager_service
+from app.services.snapshot import CachedBody
+from app.services.stream import stream_service
 
 router = APIRouter(prefix="/api/servers", tags=["servers"])
 
+_DURATION_RE = re.compile(r"^(\d+)([smhd]?)$")
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def _parse_duration(value: str, name: str) -> int:
+    """解析时长参数，如 "30s" / "1m" / "6h" / "1d"，返回秒数"""
+    m = _DURATION_RE.match(value.strip().lower())
+    if not m or int(m.group(1)) <= 0:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+    return int(m.group(1)) * _DURATION_UNITS[m.group(2)]
+
+def _cached_response(request: Request, cached: CachedBody) -> Response:
+    """返回缓存的已编码响应，支持 If-None-Match (304) 与 gzip"""
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if cached.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", "") and len(cached.body) >= 1024:
+        headers["Content-Encoding"] = "gzip"
+        return Response(cached.gzipped, media_type="application/json", headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+def _sort_servers(server_ids: list[str], sort: ServerSortKey, desc: bool) -> list[str]:
+    """排序；值缺失的服务器始终排在最后"""
+    if sort == ServerSortKey.CONFIG:
+        return server_ids[::-1] if desc else server_ids
+    def value(sid: str):
+        config, state = poller_service.get_server(sid)
+        if sort == ServerSortKey.ID:
+            return config.id
+        if sort == ServerSortKey.NAME:
+            return config.name
+        if sort == ServerSortKey.GROUP:
+            return config.description
+        if sort == ServerSortKey.STATUS:
+            return state.status.value
+        return state.cpu_avg
+    keyed = [(value(sid), sid) for sid in server_ids]
+    present = [item for item in keyed if item[0] is not None]
+    missing = [sid for v, sid in keyed if v is None]
+    present.sort(key=lambda item: item[0], reverse=desc)
+    return [sid for _, sid in present] + missing
+
+def _parse_fields(fields: str) -> set[str]:
+    """解析 state 字段投影，如 "status,cpu_avg,error_message" """
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - ServerState.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}; "
+                   f"available: {', '.join(ServerState.model_fields)}"
+        )
+    return names | {"server_id"}
+
 @router.get("", response_model=list[ServerResponse])
-async def get_all_servers():
-    """获取所有服务器及其状态"""
-    servers = poller_service.get_all_servers()
-    return [
-        ServerResponse(config=config, state=state)
-        for config, state in servers
-    ]
+async def get_all_servers(
+    request: Request,
+    status: Optional[list[ServerStatus]] = Query(None, description="服务器状态，可重复"),
+    group: Optional[list[str]] = Query(None, description="分组 (description)，可重复"),
+    channel_state: Optional[ChannelState] = Query(None, description="存在该状态的通道"),
+    cpu_gte: Optional[float] = Query(None, description="平均 CPU 不低于"),
+    cpu_lt: Optional[float] = Query(None, description="平均 CPU 低于"),
+    sort: ServerSortKey = Query(ServerSortKey.CONFIG, description="排序字段"),
+    desc: bool = Query(False, description="降序"),
+    page: Optional[int] = Query(None, ge=1, description="页码 (从1开始，需同时指定 limit)"),
+    limit: Optional[int] = Query(None, ge=1, description="每页条数，为空时不分页"),
+    fields: Optional[str] = Query(None, description="只返回的 state 字段，逗号分隔，如 status,cpu_avg")
+):
+    """
+    获取服务器及其状态
+    - 无参数时返回按状态版本缓存的完整列表（支持 ETag/gzip）
+    - 支持筛选、排序、分页与字段投影，如 ?status=offline&status=error&fields=status,error_message；
+      X-Total-Count 为分页前的匹配总数
+    """
+    if not request.query_params:
+        return _cached_response(request, poller_service.snapshot_json())
+    if page is not None and limit is None:
+        # 不分页时 page 没有意义，避免调用方误以为拿到的是某一页
+        raise HTTPException(status_code=422, detail="page requires limit")
+    include = _parse_fields(fields) if fields else None
+    server_ids = poller_service.query_servers(
+        statuses=status, groups=group, channel_state=channel_state,
+        cpu_gte=cpu_gte, cpu_lt=cpu_lt
+    )
+    server_ids = _sort_servers(server_ids, sort, desc)
+    total = len(server_ids)
+    if limit is not None:
+        page = page or 1
+        server_ids = server_ids[(page - 1) * limit:page * limit]
+    headers = {"X-Total-Count": str(total), "Cache-Control": "no-cache"}
+    if include is None:
+        # 复用各服务器已缓存的 JSON，无需重新序列化
+        body = b"[" + b",".join(poller_service.server_json(sid).body for sid in server_ids) + b"]"
+        return Response(body, media_type="application/json", headers=headers)
+    content = []
+    for sid in server_ids:
+        config, state = poller_service.get_server(sid)
+        content.append({
+            "config": config.model_dump(mode="json"),
+            "state": state.to_model().model_dump(mode="json", include=include),
+        })
+    return JSONResponse(content, headers=headers)
+
+@router.get("/stream")
+async def stream_servers(request: Request):
+    """实时状态推送 (SSE)：连接时发送完整快照，之后只推送变更"""
+    # 先订阅再生成快照，避免丢失两者之间的变更
+    sub = stream_service.subscribe()
+    
+    async def event_generator():
+        try:
+            yield stream_service.encode_raw(
+                "snapshot", poller_service.snapshot_json().body.decode()
+            )
+            while not (sub.closed and sub.queue.empty()):
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(
+                        sub.queue.get(), timeout=settings.stream_heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            stream_service.unsubscribe(sub)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/{server_id}", response_model=ServerResponse)
-async def get_server(server_id: str):
-    """获取单个服务器详情"""
-    result = poller_service.get_server(server_id)
-    if not result:
+async def get_server(server_id: str, request: Request):
+    """获取单个服务器详情（按状态版本缓存，支持 ETag）"""
+    cached = poller_service.server_json(server_id)
+    if not cached:
+        raise HTTPException(status_code=404, detail="Server not found")
+    return _cached_response(request, cached)
+
+@router.get("/{server_id}/history", response_model=HistoryResponse)
+async def get_server_history(
+    server_id: str,
+    metric: HistoryMetric = Query(HistoryMetric.CPU_AVG, description="指标"),
+    range_: str = Query("1h", alias="range", description="时间范围，如 30m / 6h / 1d"),
+    step: str = Query("1m", description="降采样步长，如 30s / 1m / 5m"),
+    channel_id: Optional[int] = Query(None, ge=1, description="通道编号 (fps/码率必填)")
+):
+    """获取指标历史（服务端按步长计算 min/max/avg）"""
+    if not poller_service.get_server(server_id):
         raise HTTPException(status_code=404, detail="Server not found")
-    config, state = result
-    return ServerResponse(config=config, state=state)
+    if metric != HistoryMetric.CPU_AVG and channel_id is None:
+        raise HTTPException(status_code=400, detail=f"channel_id is required for {metric.value}")
+    range_seconds = _parse_duration(range_, "range")
+    step_seconds = _parse_duration(step, "step")
+    if range_seconds // step_seconds > settings.history_max_points:
+        raise HTTPException(status_code=400, detail="Too many points, increase step")
+    points = history_service.query(
+        server_id, metric,
+        None if metric == HistoryMetric.CPU_AVG else channel_id,
+        range_seconds, step_seconds
+    )
+    return HistoryResponse(
+        server_id=server_id,
+        channel_id=None if metric == HistoryMetric.CPU_AVG else channel_id,
+        metric=metric,
+        range_seconds=range_seconds,
+        step_seconds=step_seconds,
+        points=points
+    )
 
 @router.post("/{server_id}/refresh", response_model=ServerResponse)
 async def refresh_server(server_id: str):
@@ -32,7 +204,7 @@ async def refresh_server(server_id: str):
         raise HTTPException(status_code=404, detail="Server not found")
     state = await poller_service.poll_server(server_id)
     config, _ = result
-    return ServerResponse(config=config, state=state)
+    return ServerResponse(config=config, state=state.to_model())
 
 @router.post(
     "/{server_id}/channels/{channel_id}/restart",
@@ -78,7 +250,9 @@ async def start_channel(
 
 @router.post("/reload")
 async def reload_config():
-    """重新加载服务器配置"""
-    poller_service.reload_servers()
+    """增量重新加载服务器配置（配置文件变化时也会自动重新加载）"""
+    if poller_service.federated:
+        raise HTTPException(status_code=409, detail="Servers are managed by sites in federation mode")
+    changes = poller_service.reload_servers()
     count = len(poller_service._servers)
-    return {"message": "Configuration reloaded", "count": count}
+    return {"message": "Configuration reloaded", "count": count, **changes}
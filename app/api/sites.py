@@ -0,0 +1,11 @@
+"""聚合模式站点 API 路由"""
+from fastapi import APIRouter
+from app.models import SiteStatus
+from app.services.federation import federation_service
+
+router = APIRouter(prefix="/api/sites", tags=["sites"])
+
+@router.get("", response_model=list[SiteStatus])
+async def list_sites():
+    """站点连接状态（非聚合模式时为空）"""
+    return federation_service.status()
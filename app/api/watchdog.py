@@ -0,0 +1,11 @@
+"""通道看门狗 API 路由"""
+from fastapi import APIRouter
+from app.models import WatchdogStatus
+from app.services.watchdog import watchdog_service
+
+router = APIRouter(prefix="/api/watchdog", tags=["watchdog"])
+
+@router.get("", response_model=WatchdogStatus)
+async def get_watchdog():
+    """看门狗状态及正在跟踪的异常通道（重启记录见 /api/events?type=watchdog_restart）"""
+    return watchdog_service.status()
@@ -1,5 +1,6 @@
 """应用配置管理"""
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -15,16 +16,112 @@ class Settings(BaseSettings):
         default=Path("servers/servers.json"),
         description="服务器配置文件路径"
     )
+    servers_watch_interval: float = Field(default=5.0, description="配置文件变化检查间隔(秒)，0 为不监视")
     
     # 轮询配置
     poll_interval: int = Field(default=30, description="轮询间隔(秒)")
     poll_timeout: float = Field(default=5.0, description="单次请求超时(秒)")
     poll_max_concurrent: int = Field(default=10, description="最大并发轮询数")
+    poll_fast_interval: float = Field(default=5.0, description="有通道停止中时的快速轮询间隔(秒)")
+    poll_backoff_max: float = Field(default=300.0, description="离线服务器退避上限(秒)")
+    poll_jitter: float = Field(default=0.1, description="轮询间隔随机抖动比例")
+    poll_fresh_window: float = Field(default=2.0, description="手动刷新时可直接复用的结果新鲜度(秒)")
+    
+    # HTTP 连接池（轮询与通道操作客户端）：并发由 poll_max_concurrent 与 channel_per_host_concurrent 限制，
+    # 连接池本身不限制连接数，每个端点保留一个空闲连接
+    http_max_connections: Optional[int] = Field(
+        default=None, description="连接池最大连接数（同时也是保活连接数上限），设置时应不少于 IPVTL 端点数"
+    )
+    http_keepalive_expiry: float = Field(default=60.0, description="空闲连接保活时间(秒)，应大于轮询间隔")
+    
+    # 断路器：按 IPVTL 端点统计连续连接失败（轮询与通道操作共用）
+    breaker_failure_threshold: int = Field(default=3, description="连续连接失败多少次后断开")
+    breaker_open_seconds: float = Field(default=30.0, description="断开后多久允许探测(秒)")
+    breaker_probe_timeout: float = Field(default=2.0, description="探测请求超时(秒)")
+    
+    # 多进程部署：为空时单进程模式；设置后同机 worker 选举唯一轮询进程并共享状态快照
+    shared_state_path: Optional[Path] = Field(
+        default=None,
+        description="共享状态快照文件路径（建议 /dev/shm/ipvtl-state.json）"
+    )
+    shared_state_sync_interval: float = Field(default=1.0, description="共享状态发布/读取间隔(秒)")
+    
+    # 状态快照：为空时不保存；设置后定期及关闭时保存，重启后立即展示最后已知状态
+    state_snapshot_path: Optional[Path] = Field(
+        default=None,
+        description="状态快照文件路径（gzip 压缩 JSON）"
+    )
+    state_snapshot_interval: float = Field(default=60.0, description="状态快照保存间隔(秒)")
+    
+    # 聚合模式：为空时直接轮询 servers.json 中的服务器；设置后订阅各站点管理实例的状态推送，
+    # 服务器ID加 "站点ID:" 前缀，通道操作转发到所属站点
+    federation_config_path: Optional[Path] = Field(
+        default=None,
+        description="站点配置文件路径（设置后作为聚合实例运行）"
+    )
+    federation_connect_timeout: float = Field(default=5.0, description="连接站点超时(秒)")
+    federation_read_timeout: float = Field(default=60.0, description="站点推送读取超时(秒)，应大于站点的 SSE 心跳间隔")
+    federation_retry_max: float = Field(default=30.0, description="站点断线重连退避上限(秒)")
+    federation_action_timeout: float = Field(default=90.0, description="转发通道操作超时(秒)，应大于停止与启动超时之和")
     
     # 通道操作配置
     channel_stop_timeout: float = Field(default=30.0, description="停止通道超时")
     channel_start_timeout: float = Field(default=30.0, description="启动通道超时")
-    channel_restart_delay: float = Field(default=2.0, description="重启间隔延迟")
+    channel_restart_delay: float = Field(default=2.0, description="已弃用：重启改为轮询就绪状态")
+    channel_ready_poll_interval: float = Field(default=0.5, description="重启时检查通道状态的间隔(秒)")
+    channel_per_host_concurrent: int = Field(default=4, description="单个 IPVTL 端点同时处理的通道操作请求数")
+    
+    # 批量任务配置
+    job_max_concurrent: int = Field(default=20, description="批量任务默认全局并发")
+    job_per_server_concurrent: int = Field(default=4, description="批量任务默认单服务器并发")
+    job_history_size: int = Field(default=100, description="保留的批量任务数")
+    
+    # 历史数据配置
+    history_capacity: int = Field(default=2880, description="每个序列保留的采样点数(每 poll_interval 秒一个，默认 24h@30s)")
+    history_max_points: int = Field(default=2000, description="单次历史查询最多返回的数据点")
+    
+    # 事件日志：为空时只保留在内存中；设置后批量追加写入 JSONL 文件并按大小轮转
+    journal_path: Optional[Path] = Field(default=None, description="事件日志文件路径")
+    journal_max_bytes: int = Field(default=10 * 1024 * 1024, description="单个日志文件大小上限(字节)")
+    journal_backups: int = Field(default=5, description="保留的轮转文件数")
+    journal_flush_interval: float = Field(default=1.0, description="批量写入间隔(秒)")
+    journal_memory_size: int = Field(default=10000, description="内存中保留的最近事件数")
+    journal_fps_drop_ratio: float = Field(default=0.3, description="帧率较上次下降超过该比例时记录事件")
+    
+    # 告警：规则与 webhook 来自 JSON 文件，文件不存在时不启用
+    alerts_config_path: Path = Field(
+        default=Path("servers/alerts.json"),
+        description="告警规则配置文件路径"
+    )
+    alert_batch_interval: float = Field(default=5.0, description="告警通知批量发送间隔(秒)")
+    alert_webhook_timeout: float = Field(default=5.0, description="webhook 请求超时(秒)")
+    alert_max_pending: int = Field(default=1000, description="单个 webhook 发送失败时最多保留的待发通知数")
+    alert_history_size: int = Field(default=1000, description="保留的已恢复告警数")
+    
+    # 通道看门狗：自动重启应运行但空闲、或长时间停止中的通道
+    watchdog_enabled: bool = Field(default=False, description="是否启用自动重启")
+    watchdog_idle_seconds: float = Field(default=60.0, description="应运行的通道空闲多久后重启(秒)")
+    watchdog_stopping_seconds: float = Field(default=120.0, description="通道停止中多久后重启(秒)")
+    watchdog_server_burst: int = Field(default=3, description="单服务器令牌桶容量")
+    watchdog_server_refill_seconds: float = Field(default=300.0, description="单服务器每恢复一个令牌的时间(秒)")
+    watchdog_cluster_burst: int = Field(default=10, description="全集群令牌桶容量")
+    watchdog_cluster_refill_seconds: float = Field(default=30.0, description="全集群每恢复一个令牌的时间(秒)")
+    watchdog_max_attempts: int = Field(default=3, description="同一通道连续重启失败多少次后放弃")
+    watchdog_backoff_base: float = Field(default=30.0, description="重启重试退避基数(秒)，每次翻倍")
+    watchdog_backoff_max: float = Field(default=900.0, description="重启重试退避上限(秒)")
+    watchdog_reset_seconds: float = Field(default=600.0, description="通道持续运行多久后清零重试次数(秒)")
+    
+    # 实时推送配置
+    stream_heartbeat: float = Field(default=15.0, description="SSE 心跳间隔(秒)")
+    stream_queue_size: int = Field(default=256, description="单个订阅者消息队列上限")
+    
+    # 诊断：轮询与通道操作的分阶段追踪、事件循环采样分析（默认关闭）
+    tracing_enabled: bool = Field(default=False, description="记录轮询与通道操作的分阶段耗时")
+    tracing_slow_threshold: float = Field(default=1.0, description="保留耗时不低于该值的操作(秒)")
+    tracing_buffer_size: int = Field(default=100, description="保留的慢操作数量上限")
+    profiler_enabled: bool = Field(default=False, description="允许通过接口运行采样分析")
+    profiler_max_seconds: float = Field(default=30.0, description="单次采样分析时长上限(秒)")
+    profiler_interval: float = Field(default=0.005, description="采样间隔(秒)")
     
     class Config:
         env_file = ".env"
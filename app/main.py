@@ -3,12 +3,27 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from app.config import settings
 from app.models import HealthResponse
 from app.api.servers import router as servers_router
+from app.api.channels import router as channels_router
+from app.api.jobs import router as jobs_router
+from app.api.events import router as events_router
+from app.api.alerts import router as alerts_router
+from app.api.watchdog import router as watchdog_router
+from app.api.sites import router as sites_router
+from app.api.cluster import router as cluster_router
+from app.api.debug import router as debug_router
 from app.services.poller import poller_service
 from app.services.manager import manager_service
+from app.services.stream import stream_service
+from app.services.jobs import job_service
+from app.services.journal import journal_service
+from app.services.alerts import alert_service
+from app.services.watchdog import watchdog_service
+from app.services.federation import federation_service
+from app.services.metrics import MetricsMiddleware, metrics_registry
 
 # 配置日志
 logging.basicConfig(
@@ -22,13 +37,23 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
+    await journal_service.start()
+    await alert_service.start()
     await poller_service.start()
+    await federation_service.start()
     await manager_service.start()
+    await watchdog_service.start()
     yield
     # 关闭时
     logger.info("Shutting down...")
+    stream_service.close_all()
+    await watchdog_service.stop()
+    await job_service.stop()
     await manager_service.stop()
+    await federation_service.stop()
     await poller_service.stop()
+    await journal_service.stop()
+    await alert_service.stop()
 
 # 创建应用
 app = FastAPI(
@@ -37,8 +62,19 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# 请求耗时指标
+app.add_middleware(MetricsMiddleware)
+
 # 注册 API 路由
 app.include_router(servers_router)
+app.include_router(channels_router)
+app.include_router(jobs_router)
+app.include_router(events_router)
+app.include_router(alerts_router)
+app.include_router(watchdog_router)
+app.include_router(sites_router)
+app.include_router(cluster_router)
+app.include_router(debug_router)
 
 # 健康检查端点
 @app.get("/health", response_model=HealthResponse, tags=["system"])
@@ -51,6 +87,15 @@ async def health_check():
         poll_interval=settings.poll_interval
     )
 
+# 指标端点 (Prometheus 文本格式)
+@app.get("/metrics", response_class=PlainTextResponse, tags=["system"])
+async def metrics():
+    """运行指标"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 # 挂载静态文件
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
@@ -1,8 +1,8 @@
 """数据模型定义"""
 from datetime import datetime
 from enum import Enum
-from typing import Optional
-from pydantic import BaseModel, Field, computed_field
+from typing import Any, Optional, Union
+from pydantic import BaseModel, Field, computed_field, model_validator
 
 class ChannelState(str, Enum):
     """通道状态枚举（与 IPVTL API 一致）"""
@@ -16,17 +16,54 @@ class ServerStatus(str, Enum):
     OFFLINE = "offline"
     ERROR = "error"
 
+class CircuitState(str, Enum):
+    """IPVTL 端点断路器状态"""
+    CLOSED = "closed"  # 正常
+    OPEN = "open"  # 连续失败，请求直接失败
+    HALF_OPEN = "half_open"  # 冷却结束，允许一次探测请求
+
+class HistoryMetric(str, Enum):
+    """可查询的历史指标"""
+    CPU_AVG = "cpu_avg"  # 服务器平均 CPU
+    FPS = "fps"  # 通道帧率
+    BITRATE = "bitrate_kbps"  # 通道码率
+
 class ChannelInfo(BaseModel):
     """通道信息"""
     id: int  # 通道编号 (1-based)
     state: ChannelState = ChannelState.IDLE
     status: str = ""  # 运行状态描述 "12:34:56 30fps@1234Kbps"
+    # 由 status 解析得到的指标，无法识别时为 None
+    uptime_seconds: Optional[int] = None
+    fps: Optional[float] = None
+    bitrate_kbps: Optional[int] = None
     
     @computed_field
     @property
     def name(self) -> str:
         return f"Channel {self.id}"
 
+class ChannelSortKey(str, Enum):
+    """通道查询排序字段"""
+    SERVER = "server"
+    FPS = "fps"
+    BITRATE = "bitrate_kbps"
+    UPTIME = "uptime_seconds"
+
+class ServerSortKey(str, Enum):
+    """服务器列表排序字段"""
+    CONFIG = "config"  # 配置文件顺序
+    ID = "id"
+    NAME = "name"
+    GROUP = "group"
+    STATUS = "status"
+    CPU = "cpu_avg"
+
+class ServerChannelInfo(ChannelInfo):
+    """跨服务器通道查询结果"""
+    server_id: str
+    server_name: str
+
 class IPVTLStatusResponse(BaseModel):
     """IPVTL /status 接口响应"""
     channels: list[dict]  # [{"state": "idle", "status": "..."}, ...]
@@ -53,6 +90,8 @@ class ServerState(BaseModel):
     channels: list[ChannelInfo] = Field(default_factory=list)
     last_poll_time: Optional[datetime] = None
     error_message: Optional[str] = None
+    stale: bool = False  # 来自重启前保存的快照，尚未重新轮询
+    circuit: CircuitState = CircuitState.CLOSED
 
 class ServerResponse(BaseModel):
     """API 响应：服务器完整信息"""
@@ -65,6 +104,243 @@ class ChannelActionResult(BaseModel):
     message: str
     channel_id: int
     server_id: str
+    timings: dict[str, float] = Field(default_factory=dict)  # 各阶段耗时(秒)
+
+class HistoryPoint(BaseModel):
+    """历史数据点（一个降采样时间桶）"""
+    time: datetime  # 桶起始时间
+    min: float
+    max: float
+    avg: float
+    count: int  # 桶内采样数
+
+class HistoryResponse(BaseModel):
+    """API 响应：指标历史"""
+    server_id: str
+    channel_id: Optional[int] = None
+    metric: HistoryMetric
+    range_seconds: int
+    step_seconds: int
+    points: list[HistoryPoint]
+
+class ChannelAction(str, Enum):
+    """通道操作"""
+    START = "start"
+    STOP = "stop"
+    RESTART = "restart"
+
+class JobState(str, Enum):
+    """批量任务状态"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+class ChannelTarget(BaseModel):
+    """批量操作目标通道"""
+    server_id: str
+    channel_id: int = Field(..., ge=1)
+
+class ChannelSelector(BaseModel):
+    """通道选择器：各条件取交集，未指定的条件不限制"""
+    server_ids: Optional[list[str]] = None
+    channel_ids: Optional[list[int]] = None
+    state: Optional[ChannelState] = None
+
+class BulkActionRequest(BaseModel):
+    """批量通道操作请求（targets 与 selector 结果合并去重）"""
+    action: ChannelAction
+    targets: list[ChannelTarget] = Field(default_factory=list)
+    selector: Optional[ChannelSelector] = None
+    max_concurrent: Optional[int] = Field(default=None, ge=1, description="全局并发上限")
+    per_server_concurrent: Optional[int] = Field(default=None, ge=1, description="单服务器并发上限")
+    batch_size: Optional[int] = Field(default=None, ge=1, description="滚动模式每批通道数")
+    batch_pause: float = Field(default=0.0, ge=0, description="批次间暂停(秒)")
+    abort_on_failure: bool = Field(default=False, description="滚动模式下某批有失败时停止后续批次")
+
+class JobInfo(BaseModel):
+    """批量任务进度"""
+    id: str
+    action: ChannelAction
+    state: JobState = JobState.PENDING
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    total: int = 0
+    completed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    batches: int = 1
+    current_batch: int = 0
+    results: list[ChannelActionResult] = Field(default_factory=list)
+
+class EventType(str, Enum):
+    """事件日志类型"""
+    CHANNEL_STATE = "channel_state"  # 通道状态变化
+    FPS_DROP = "fps_drop"  # 运行中通道帧率骤降
+    SERVER_ONLINE = "server_online"
+    SERVER_OFFLINE = "server_offline"  # 离线或返回错误
+    WATCHDOG_RESTART = "watchdog_restart"  # 看门狗自动重启通道（每次尝试一条）
+
+class JournalEvent(BaseModel):
+    """事件日志条目"""
+    time: datetime
+    type: EventType
+    server_id: str
+    channel_id: Optional[int] = None
+    previous: Optional[Union[float, str]] = None  # 变化前的状态或帧率
+    current: Optional[Union[float, str]] = None
+    message: Optional[str] = None
+
+class AlertMetric(str, Enum):
+    """告警规则指标"""
+    STATUS = "status"  # 服务器状态
+    CPU_AVG = "cpu_avg"  # 服务器平均 CPU
+    CHANNEL_STATE = "channel_state"  # 每个通道的状态
+    CHANNEL_FPS = "channel_fps"  # 每个运行中通道的帧率
+
+class AlertOperator(str, Enum):
+    """告警规则比较运算符"""
+    GT = ">"
+    GE = ">="
+    LT = "<"
+    LE = "<="
+    EQ = "=="
+    NE = "!="
+
+class AlertRule(BaseModel):
+    """告警规则：条件连续满足 for_polls 次调度轮询且持续 for_seconds 秒后触发"""
+    name: str
+    metric: AlertMetric
+    op: AlertOperator
+    value: Union[float, str]
+    for_polls: int = Field(default=1, ge=1, description="连续满足的调度轮询次数")
+    for_seconds: float = Field(default=0.0, ge=0, description="条件持续时间(秒)")
+    severity: str = "warning"
+    groups: Optional[list[str]] = None  # 仅对这些分组的服务器生效
+
+    @model_validator(mode="after")
+    def _check_value(self):
+        if self.metric in (AlertMetric.STATUS, AlertMetric.CHANNEL_STATE):
+            if self.op not in (AlertOperator.EQ, AlertOperator.NE):
+                raise ValueError(f"{self.metric.value} only supports == and !=")
+            enum = ServerStatus if self.metric == AlertMetric.STATUS else ChannelState
+            self.value = enum(self.value).value
+        elif not isinstance(self.value, float):
+            raise ValueError(f"{self.metric.value} requires a numeric value")
+        return self
+
+class AlertsConfig(BaseModel):
+    """告警配置（来自 JSON 文件）"""
+    rules: list[AlertRule] = Field(default_factory=list)
+    webhooks: list[str] = Field(default_factory=list)
+
+class AlertState(str, Enum):
+    """告警状态"""
+    FIRING = "firing"
+    RESOLVED = "resolved"
+
+class Alert(BaseModel):
+    """告警"""
+    rule: str
+    severity: str
+    state: AlertState = AlertState.FIRING
+    server_id: str
+    channel_id: Optional[int] = None
+    value: Optional[Union[float, str]] = None  # 触发时的指标值
+    since: datetime  # 条件开始满足的时间
+    fired_at: datetime
+    resolved_at: Optional[datetime] = None
+
+class WatchdogIncident(BaseModel):
+    """看门狗跟踪的异常通道"""
+    server_id: str
+    channel_id: int
+    state: Optional[ChannelState] = None  # 当前异常状态，已恢复运行时为 None
+    since: Optional[datetime] = None  # 进入异常状态的时间
+    attempts: int = 0  # 已尝试重启次数
+    next_attempt_at: Optional[datetime] = None
+    in_progress: bool = False
+    gave_up: bool = False  # 重试次数用尽，需人工处理
+
+class WatchdogStatus(BaseModel):
+    """看门狗状态"""
+    enabled: bool
+    cluster_tokens: float  # 全集群令牌桶剩余令牌
+    incidents: list[WatchdogIncident]
+
+class HotServer(BaseModel):
+    """CPU 最高的服务器"""
+    server_id: str
+    name: str
+    cpu_avg: float
+    bitrate_kbps: int  # 运行中通道码率之和
+
+class ClusterStatsResponse(BaseModel):
+    """全集群统计（通道、码率与 CPU 只统计在线服务器）"""
+    servers_total: int
+    servers_by_status: dict[str, int]
+    channels_total: int
+    channels_by_state: dict[str, int]
+    bitrate_total_kbps: int  # 运行中通道码率之和
+    bitrate_avg_kbps: Optional[float] = None  # 平均每台在线服务器
+    bitrate_max_kbps: Optional[int] = None
+    cpu_cores: int  # 参与统计的核心数
+    cpu_percentiles: dict[str, Optional[int]]  # 所有核心 CPU 使用率的 p50/p90/p95/p99/max
+    hottest: list[HotServer]
+
+class SiteConfig(BaseModel):
+    """聚合模式下的站点（下级管理实例，来自 JSON 文件）"""
+    id: str = Field(..., pattern=r"^[^:/]+$")  # 服务器ID前缀，不能包含 ":" 和 "/"
+    name: str
+    url: str  # 站点管理实例地址，如 http://10.1.0.10:8000
+
+class SiteStatus(BaseModel):
+    """站点连接状态"""
+    id: str
+    name: str
+    url: str
+    connected: bool = False
+    connected_since: Optional[datetime] = None
+    last_event_at: Optional[datetime] = None
+    servers_count: int = 0
+    reconnects: int = 0
+    error: Optional[str] = None
+
+class TraceSpan(BaseModel):
+    """追踪中的一个阶段"""
+    name: str  # 如 semaphore_wait、request、http.connect_tcp、json_parse、apply、wait_idle
+    start_ms: float  # 相对操作开始的时间
+    duration_ms: float
+    attributes: dict[str, Any] = {}
+
+class TraceInfo(BaseModel):
+    """一次慢操作（端点轮询或通道操作）"""
+    name: str  # poll、channel_start、channel_stop、channel_restart
+    started_at: datetime
+    duration_ms: float
+    error: Optional[str] = None  # 未处理的异常类型
+    attributes: dict[str, Any] = {}
+    spans: list[TraceSpan]
+
+class ProfileFunction(BaseModel):
+    """采样分析中的函数（"文件:首行号 函数名"）"""
+    function: str
+    self_samples: int  # 位于调用栈顶端的采样数
+    total_samples: int  # 出现在调用栈中的采样数
+    total_percent: float
+
+class ProfileStack(BaseModel):
+    """折叠调用栈（由外到内以 ";" 连接，可直接用于火焰图工具）"""
+    stack: str
+    samples: int
+
+class ProfileResult(BaseModel):
+    """事件循环采样分析结果"""
+    duration_seconds: float
+    samples: int
+    functions: list[ProfileFunction]
+    stacks: list[ProfileStack]
 
 class HealthResponse(BaseModel):
     """健康检查响应"""
@@ -8,5 +8,7 @@
 """服务层模块"""
 from app.services.poller import poller_service
 from app.services.manager import manager_service
+from app.services.stream import stream_service
+from app.services.jobs import job_service
 
-__all__ = ["poller_service", "manager_service"]
+__all__ = ["poller_service", "manager_service", "stream_service", "job_service"]
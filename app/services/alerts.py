@@ -0,0 +1,269 @@
+"""告警规则引擎：每次轮询后增量评估，去重后批量发送到 webhook"""
+import asyncio
+import json
+import logging
+import operator
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+import httpx
+from app.config import settings
+from app.models import (
+    Alert, AlertMetric, AlertOperator, AlertRule, AlertsConfig, AlertState,
+    ChannelState, ServerConfig, ServerStatus
+)
+from app.services.metrics import ALERT_NOTIFICATIONS_TOTAL, ALERT_WEBHOOK_TOTAL, ALERTS_FIRING
+from app.services.state_records import ServerRecord
+from app.services.stream import stream_service
+
+logger = logging.getLogger(__name__)
+
+_OPERATORS = {
+    AlertOperator.GT: operator.gt,
+    AlertOperator.GE: operator.ge,
+    AlertOperator.LT: operator.lt,
+    AlertOperator.LE: operator.le,
+    AlertOperator.EQ: operator.eq,
+    AlertOperator.NE: operator.ne,
+}
+
+_CHANNEL_METRICS = (AlertMetric.CHANNEL_STATE, AlertMetric.CHANNEL_FPS)
+
+# (规则名, 通道ID)，服务器级规则的通道ID为 None
+_Key = tuple[str, Optional[int]]
+
+class _Tracker:
+    """单个 (规则, 服务器, 通道) 的条件满足进度"""
+    __slots__ = ("since", "polls", "value", "alert")
+
+    def __init__(self, since: datetime):
+        self.since = since
+        self.polls = 0
+        # 最近一次满足条件时的值；服务器不可达、进度保持期间为 None
+        self.value: Union[float, str, None] = None
+        self.alert: Optional[Alert] = None
+
+class AlertService:
+    """
+    - 评估只针对刚完成轮询的服务器，按服务器保存各规则的满足进度，不扫描全集群；
+      for_polls 只计调度轮询，for_seconds 在每个发送周期也检查一次（不必等到下次轮询）
+    - 只在触发与恢复时产生通知；同一告警在一个发送周期内触发又恢复时两条通知都不发送
+    - 通知按周期批量 POST 到每个 webhook，发送失败的保留到下个周期重试
+    告警只在轮询进程中评估
+    """
+
+    def __init__(self):
+        self._rules: list[AlertRule] = []
+        self._webhooks: list[str] = []
+        self._trackers: dict[str, dict[_Key, _Tracker]] = {}
+        self._resolved: deque[Alert] = deque(maxlen=settings.alert_history_size)
+        self._pending: dict[tuple[str, _Key], Alert] = {}  # 本周期待发送的通知
+        self._outbox: dict[str, list[dict]] = {}  # 每个 webhook 待发送（含重试）的通知
+        self._client: Optional[httpx.AsyncClient] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        ALERTS_FIRING.set_callback(lambda: len(self.active()))
+
+    @property
+    def rules(self) -> list[AlertRule]:
+        return self._rules
+
+    async def start(self):
+        self.load_config()
+        self._client = httpx.AsyncClient(timeout=settings.alert_webhook_timeout)
+        self._dispatch_task = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        """停止发送任务，并尝试发送剩余通知"""
+        if self._dispatch_task:
+            self._dispatch_task.cancel()
+            try:
+                await self._dispatch_task
+            except asyncio.CancelledError:
+                pass
+            self._dispatch_task = None
+        if self._client:
+            await self._dispatch()
+            await self._client.aclose()
+            self._client = None
+
+    def load_config(self) -> int:
+        """读取规则与 webhook；已删除规则的告警直接清除（不发送恢复通知），返回规则数"""
+        path = Path(settings.alerts_config_path)
+        if not path.exists():
+            config = AlertsConfig()
+        else:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    config = AlertsConfig(**json.load(f))
+            except (ValueError, TypeError) as e:
+                logger.error(f"Invalid alerts config {path}: {e}")
+                return len(self._rules)
+        self._rules = config.rules
+        self._webhooks = config.webhooks
+        names = {rule.name for rule in self._rules}
+        for trackers in self._trackers.values():
+            for key in [key for key in trackers if key[0] not in names]:
+                del trackers[key]
+        self._outbox = {url: self._outbox.get(url, []) for url in self._webhooks}
+        logger.info(f"Loaded {len(self._rules)} alert rules, {len(self._webhooks)} webhooks")
+        return len(self._rules)
+
+    # ==================== 评估 ====================
+
+    def evaluate(self, config: ServerConfig, state: ServerRecord, count_poll: bool = True):
+        """
+        评估一台服务器的本次轮询结果
+        count_poll: 是否计入 for_polls；手动刷新等额外轮询只更新条件是否满足
+        """
+        if not self._rules:
+            return
+        now = state.last_poll_time or datetime.now()
+        trackers = self._trackers.setdefault(config.id, {})
+        matched: dict[_Key, Union[float, str]] = {}
+        skipped: set[str] = set()
+        for rule in self._rules:
+            if rule.groups is not None and config.description not in rule.groups:
+                continue
+            compare = _OPERATORS[rule.op]
+            if rule.metric == AlertMetric.STATUS:
+                if compare(state.status.value, rule.value):
+                    matched[(rule.name, None)] = state.status.value
+                continue
+            if state.status != ServerStatus.ONLINE:
+                # 服务器不可达时 CPU 与通道状态是最后一次成功轮询的值，保持原有进度
+                skipped.add(rule.name)
+                continue
+            if rule.metric not in _CHANNEL_METRICS:
+                if state.cpu_avg is not None and compare(state.cpu_avg, rule.value):
+                    matched[(rule.name, None)] = state.cpu_avg
+                continue
+            for ch in state.channels:
+                if rule.metric == AlertMetric.CHANNEL_STATE:
+                    value = ch.state.value
+                elif ch.state == ChannelState.RUNNING:
+                    value = ch.fps
+                else:
+                    continue
+                if value is not None and compare(value, rule.value):
+                    matched[(rule.name, ch.id)] = value
+
+        rules = {rule.name: rule for rule in self._rules}
+        for key in list(trackers):
+            if key in matched:
+                continue
+            if key[0] in skipped:
+                trackers[key].value = None
+                continue
+            tracker = trackers.pop(key)
+            if tracker.alert is not None:
+                self._resolve(config.id, key, tracker.alert, now)
+        for key, value in matched.items():
+            tracker = trackers.get(key)
+            if tracker is None:
+                tracker = trackers[key] = _Tracker(now)
+            if count_poll:
+                tracker.polls += 1
+            tracker.value = value
+            self._fire_if_due(config.id, key, tracker, rules[key[0]], now)
+
+    def _check_durations(self):
+        """for_seconds 到期检查：条件持续满足但之后没有新的轮询时也能按时触发"""
+        if not self._rules:
+            return
+        now = datetime.now()
+        rules = {rule.name: rule for rule in self._rules}
+        for server_id, trackers in self._trackers.items():
+            for key, tracker in trackers.items():
+                if tracker.value is not None:
+                    self._fire_if_due(server_id, key, tracker, rules[key[0]], now)
+
+    def _fire_if_due(self, server_id: str, key: _Key, tracker: _Tracker, rule: AlertRule, now: datetime):
+        if (tracker.alert is None and tracker.polls >= rule.for_polls
+                and (now - tracker.since).total_seconds() >= rule.for_seconds):
+            tracker.alert = Alert(
+                rule=rule.name, severity=rule.severity, server_id=server_id,
+                channel_id=key[1], value=tracker.value, since=tracker.since, fired_at=now
+            )
+            self._notify(server_id, key, tracker.alert)
+
+    def forget(self, server_id: str):
+        """服务器从配置中删除时清除其告警（不发送恢复通知）"""
+        self._trackers.pop(server_id, None)
+
+    def _resolve(self, server_id: str, key: _Key, alert: Alert, now: datetime):
+        alert.state = AlertState.RESOLVED
+        alert.resolved_at = now
+        self._resolved.append(alert)
+        pending = self._pending.get((server_id, key))
+        if pending is not None and pending.state == AlertState.FIRING:
+            # 触发通知尚未发送，恢复后两者都不必发送
+            del self._pending[(server_id, key)]
+            self._publish(alert)
+            return
+        self._notify(server_id, key, alert)
+
+    def _notify(self, server_id: str, key: _Key, alert: Alert):
+        ALERT_NOTIFICATIONS_TOTAL.inc(state=alert.state.value)
+        # 保存副本：告警对象之后还会被修改
+        self._pending[(server_id, key)] = alert.model_copy()
+        self._publish(alert)
+
+    @staticmethod
+    def _publish(alert: Alert):
+        stream_service.publish("alert", alert.model_dump(mode="json"))
+        channel = f" channel {alert.channel_id}" if alert.channel_id is not None else ""
+        logger.info(f"Alert {alert.state.value}: {alert.rule} on {alert.server_id}{channel}")
+
+    # ==================== 查询 ====================
+
+    def active(self) -> list[Alert]:
+        """当前触发中的告警"""
+        return [
+            tracker.alert for trackers in self._trackers.values()
+            for tracker in trackers.values() if tracker.alert is not None
+        ]
+
+    def resolved(self) -> list[Alert]:
+        """最近恢复的告警（新的在前）"""
+        return list(reversed(self._resolved))
+
+    # ==================== 发送 ====================
+
+    async def _dispatch_loop(self):
+        while True:
+            await asyncio.sleep(settings.alert_batch_interval)
+            self._check_durations()
+            await self._dispatch()
+
+    async def _dispatch(self):
+        if self._pending:
+            batch = [alert.model_dump(mode="json") for alert in self._pending.values()]
+            self._pending = {}
+            for url, outbox in self._outbox.items():
+                outbox.extend(batch)
+                overflow = len(outbox) - settings.alert_max_pending
+                if overflow > 0:
+                    logger.warning(f"Dropping {overflow} alert notifications for {url}")
+                    del outbox[:overflow]
+        await asyncio.gather(*(
+            self._post(url, outbox) for url, outbox in self._outbox.items() if outbox
+        ))
+
+    async def _post(self, url: str, outbox: list[dict]):
+        count = len(outbox)
+        try:
+            resp = await self._client.post(url, json={
+                "source": settings.app_name, "alerts": outbox[:count]
+            })
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            ALERT_WEBHOOK_TOTAL.inc(outcome="error")
+            logger.warning(f"Alert webhook {url} failed ({count} notifications pending): {e}")
+            return
+        ALERT_WEBHOOK_TOTAL.inc(outcome="success")
+        # 发送期间可能追加了新通知，只删除已发送的部分
+        del outbox[:count]
+
+# 全局单例
+alert_service = AlertService()
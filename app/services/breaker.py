@@ -0,0 +1,139 @@
+"""IPVTL 端点断路器（轮询与通道操作共用）"""
+import logging
+import time
+from typing import Callable, Optional
+from app.config import settings
+from app.models import CircuitState
+from app.services.metrics import BREAKER_TRANSITIONS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """断路器打开，请求未发出"""
+
+class CircuitBreaker:
+    """单个端点的断路器状态"""
+    __slots__ = ("state", "failures", "opened_at", "probe_started")
+
+    def __init__(self):
+        self.state = CircuitState.CLOSED
+        self.failures = 0  # 连续连接失败次数
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+
+class BreakerService:
+    """
+    按端点(base_url)统计连续连接失败：
+    - CLOSED: 正常放行，连续失败达到阈值后转为 OPEN
+    - OPEN: 直接拒绝，breaker_open_seconds 后转为 HALF_OPEN
+    - HALF_OPEN: 只放行一个探测请求，成功则 CLOSED，失败则重新 OPEN
+    只有连接层错误（拒绝连接、超时等）计为失败，收到任何 HTTP 响应均视为端点可达
+    """
+
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._listener: Optional[Callable[[str, CircuitState], None]] = None
+
+    def set_listener(self, listener: Callable[[str, CircuitState], None]):
+        """注册状态变化回调 (endpoint, 新状态)"""
+        self._listener = listener
+
+    def state(self, endpoint: str) -> CircuitState:
+        breaker = self._breakers.get(endpoint)
+        return breaker.state if breaker else CircuitState.CLOSED
+
+    def allow(self, endpoint: str) -> bool:
+        """是否允许向该端点发送请求（HALF_OPEN 时占用探测名额）"""
+        breaker = self._breakers.get(endpoint)
+        if breaker is None or breaker.state == CircuitState.CLOSED:
+            return True
+        now = time.monotonic()
+        if breaker.state == CircuitState.OPEN:
+            if now - breaker.opened_at < settings.breaker_open_seconds:
+                return False
+            self._transition(endpoint, breaker, CircuitState.HALF_OPEN)
+        # 探测请求被取消时不会回报结果，超过冷却时间后允许新的探测
+        if (breaker.probe_started is not None
+                and now - breaker.probe_started < settings.breaker_open_seconds):
+            return False
+        breaker.probe_started = now
+        return True
+
+    def release(self, endpoint: str):
+        """归还 allow() 占用的探测名额（请求最终未发出时）"""
+        breaker = self._breakers.get(endpoint)
+        if breaker is not None:
+            breaker.probe_started = None
+
+    def check(self, endpoint: str):
+        """
+        断路器打开且仍在冷却期内、或冷却结束后已有探测请求进行中时抛出 CircuitOpenError；
+        只检查，不占用探测名额
+        """
+        breaker = self._breakers.get(endpoint)
+        if breaker is None or breaker.state == CircuitState.CLOSED:
+            return
+        retry_after = self.retry_after(endpoint)
+        if retry_after > 0:
+            raise CircuitOpenError(
+                f"Circuit open for {endpoint} after repeated connection failures, "
+                f"retry in {retry_after:.0f}s"
+            )
+        if (breaker.probe_started is not None
+                and time.monotonic() - breaker.probe_started < settings.breaker_open_seconds):
+            raise CircuitOpenError(f"Circuit half-open for {endpoint}, probe in progress")
+
+    def acquire(self, endpoint: str):
+        """同 allow()，不允许时抛出 CircuitOpenError；HALF_OPEN 时占用探测名额"""
+        if not self.allow(endpoint):
+            self.check(endpoint)
+            raise CircuitOpenError(f"Circuit half-open for {endpoint}, probe in progress")
+
+    def retry_after(self, endpoint: str) -> float:
+        """距离允许探测的剩余秒数"""
+        breaker = self._breakers.get(endpoint)
+        if breaker is None or breaker.state == CircuitState.CLOSED:
+            return 0.0
+        return max(0.0, breaker.opened_at + settings.breaker_open_seconds - time.monotonic())
+
+    def is_probe(self, endpoint: str) -> bool:
+        """当前请求是否为 HALF_OPEN 状态下的探测"""
+        return self.state(endpoint) == CircuitState.HALF_OPEN
+
+    def record_success(self, endpoint: str):
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            return
+        breaker.failures = 0
+        breaker.probe_started = None
+        if breaker.state != CircuitState.CLOSED:
+            self._transition(endpoint, breaker, CircuitState.CLOSED)
+
+    def record_failure(self, endpoint: str):
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker()
+        breaker.failures += 1
+        breaker.probe_started = None
+        if breaker.state != CircuitState.CLOSED:
+            # 探测（或冷却结束后的请求）失败，重新开始冷却
+            breaker.opened_at = time.monotonic()
+            if breaker.state != CircuitState.OPEN:
+                self._transition(endpoint, breaker, CircuitState.OPEN)
+        elif breaker.failures >= settings.breaker_failure_threshold:
+            breaker.opened_at = time.monotonic()
+            self._transition(endpoint, breaker, CircuitState.OPEN)
+
+    def remove(self, endpoint: str):
+        """删除端点（配置中已不存在）"""
+        self._breakers.pop(endpoint, None)
+
+    def _transition(self, endpoint: str, breaker: CircuitBreaker, state: CircuitState):
+        breaker.state = state
+        BREAKER_TRANSITIONS_TOTAL.inc(state=state.value)
+        logger.info(f"Circuit {state.value} for {endpoint}")
+        if self._listener is not None:
+            self._listener(endpoint, state)
+
+# 全局单例
+breaker_service = BreakerService()
@@ -0,0 +1,127 @@
+"""通道二级索引：按状态/帧率/码率筛选全集群通道时无需遍历全部通道"""
+import bisect
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional
+from app.models import ChannelState, ServerStatus
+from app.services.state_records import ChannelRecord, ServerRecord
+
+# (服务器ID, 通道编号)
+_Key = tuple[str, int]
+
+class _Entry(NamedTuple):
+    """通道当前所在的索引位置"""
+    state: ChannelState
+    fps: Optional[float]
+    bitrate_kbps: Optional[int]
+
+class ChannelIndex:
+    """
+    随轮询结果增量维护的通道索引：轮询只带来部分通道变化时只更新这些通道
+    - 按状态分组的集合，按帧率、码率升序的列表（指标缺失的通道不在其中）
+    - 记录在线的服务器，用于 online_only 筛选
+    """
+
+    def __init__(self):
+        self._entries: dict[_Key, _Entry] = {}
+        self._records: dict[_Key, ChannelRecord] = {}
+        self._by_server: defaultdict[str, set[_Key]] = defaultdict(set)
+        self._by_state: defaultdict[ChannelState, set[_Key]] = defaultdict(set)
+        self._by_fps: list[tuple[float, _Key]] = []
+        self._by_bitrate: list[tuple[int, _Key]] = []
+        self._online: set[str] = set()
+
+    def update(
+        self, server_id: str, state: ServerRecord,
+        channels: Optional[Iterable[ChannelRecord]] = None
+    ):
+        """按最新状态更新服务器的通道；channels 为本次变化的通道，为 None 时重建该服务器的全部通道"""
+        if state.status is ServerStatus.ONLINE:
+            self._online.add(server_id)
+        else:
+            self._online.discard(server_id)
+        if channels is None:
+            channels = state.channels
+            current = {(server_id, ch.id) for ch in channels}
+            for key in self._by_server[server_id] - current:
+                self._remove_channel(key)
+        for ch in channels:
+            self._update_channel(server_id, ch)
+
+    def remove(self, server_id: str):
+        """删除服务器的全部通道"""
+        for key in list(self._by_server.pop(server_id, ())):
+            self._remove_channel(key)
+        self._online.discard(server_id)
+
+    def _update_channel(self, server_id: str, ch: ChannelRecord):
+        key = (server_id, ch.id)
+        self._records[key] = ch
+        entry = _Entry(ch.state, ch.fps, ch.bitrate_kbps)
+        old = self._entries.get(key)
+        if old == entry:
+            return
+        if old is not None:
+            self._unindex(key, old)
+        self._entries[key] = entry
+        self._by_server[server_id].add(key)
+        self._by_state[entry.state].add(key)
+        if entry.fps is not None:
+            bisect.insort(self._by_fps, (entry.fps, key))
+        if entry.bitrate_kbps is not None:
+            bisect.insort(self._by_bitrate, (entry.bitrate_kbps, key))
+
+    def _remove_channel(self, key: _Key):
+        old = self._entries.pop(key, None)
+        self._records.pop(key, None)
+        self._by_server[key[0]].discard(key)
+        if old is not None:
+            self._unindex(key, old)
+
+    def _unindex(self, key: _Key, entry: _Entry):
+        self._by_state[entry.state].discard(key)
+        for column, value in ((self._by_fps, entry.fps), (self._by_bitrate, entry.bitrate_kbps)):
+            if value is None:
+                continue
+            i = bisect.bisect_left(column, (value, key))
+            if i < len(column) and column[i] == (value, key):
+                del column[i]
+
+    @staticmethod
+    def _range(column: list, gte, lt) -> set[_Key]:
+        lo = 0 if gte is None else bisect.bisect_left(column, (gte,))
+        hi = len(column) if lt is None else bisect.bisect_left(column, (lt,))
+        return {key for _, key in column[lo:hi]}
+
+    def select(
+        self,
+        server_id: Optional[str] = None,
+        state: Optional[ChannelState] = None,
+        fps_lt: Optional[float] = None,
+        fps_gte: Optional[float] = None,
+        bitrate_lt: Optional[int] = None,
+        bitrate_gte: Optional[int] = None,
+        online_only: bool = True
+    ) -> list[tuple[_Key, ChannelRecord]]:
+        """返回满足所有条件的通道（无序）"""
+        candidates: list[set[_Key]] = []
+        if server_id is not None:
+            candidates.append(self._by_server.get(server_id, set()))
+        if state is not None:
+            candidates.append(self._by_state.get(state, set()))
+        if fps_lt is not None or fps_gte is not None:
+            candidates.append(self._range(self._by_fps, fps_gte, fps_lt))
+        if bitrate_lt is not None or bitrate_gte is not None:
+            candidates.append(self._range(self._by_bitrate, bitrate_gte, bitrate_lt))
+        if candidates:
+            # 从最小的集合开始求交集
+            candidates.sort(key=len)
+            keys = set(candidates[0])
+            for other in candidates[1:]:
+                keys &= other
+        else:
+            keys = self._records.keys()
+        online = self._online
+        return [
+            (key, self._records[key]) for key in keys
+            if not online_only or key[0] in online
+        ]
@@ -0,0 +1,156 @@
+"""全集群统计：按列存储每台服务器的指标，随状态变化增量更新合计"""
+import heapq
+import math
+from array import array
+from typing import Optional
+from app.models import ChannelState, ServerStatus
+from app.services.state_records import ServerRecord
+
+_NAN = float("nan")
+_STATUSES = list(ServerStatus)
+_STATUS_CODES = {status: i for i, status in enumerate(_STATUSES)}
+_CHANNEL_STATES = list(ChannelState)
+_CHANNEL_CODES = {state: i for i, state in enumerate(_CHANNEL_STATES)}
+_PERCENTILES = (50, 90, 95, 99)
+
+class ClusterStats:
+    """
+    每台服务器占用各列中的一个槽位（删除后复用），只有在线服务器计入通道、码率与 CPU：
+    - 合计值在更新单台服务器时减去旧贡献、加上新贡献，查询时不遍历服务器
+    - 所有核心的 CPU 使用率计入 0-100 的计数直方图，分位数由直方图累加得到（精确到 1%）
+    - 最热服务器在 CPU 列上用 heapq 选出前 N 个
+    """
+
+    def __init__(self):
+        self._slots: dict[str, int] = {}
+        self._ids: list[Optional[str]] = []
+        self._free: list[int] = []
+        self._status = array("b")  # 状态编号，空槽位为 -1
+        self._cpu_avg = array("d")  # 非在线为 NaN
+        self._bitrate = array("q")  # 运行中通道码率之和 (Kbps)
+        self._channels = array("l")  # 每个槽位按通道状态顺序占 len(ChannelState) 个计数
+        self._cores: list[tuple[int, ...]] = []  # 已计入直方图的各核心 CPU
+        self._core_hist = array("q", [0] * 101)
+        self._status_totals = [0] * len(_STATUSES)
+        self._channel_totals = [0] * len(_CHANNEL_STATES)
+        self._bitrate_total = 0
+        self._online = 0
+
+    def update(self, server_id: str, state: ServerRecord):
+        """按服务器最新状态更新其槽位与各项合计"""
+        slot = self._slots.get(server_id)
+        if slot is None:
+            slot = self._allocate(server_id)
+        else:
+            self._subtract(slot)
+        online = state.status is ServerStatus.ONLINE
+        self._status[slot] = code = _STATUS_CODES[state.status]
+        self._status_totals[code] += 1
+        if not online:
+            return
+        self._online += 1
+        self._cpu_avg[slot] = _NAN if state.cpu_avg is None else state.cpu_avg
+        base = slot * len(_CHANNEL_STATES)
+        bitrate = 0
+        for ch in state.channels:
+            self._channels[base + _CHANNEL_CODES[ch.state]] += 1
+            if ch.state is ChannelState.RUNNING and ch.bitrate_kbps:
+                bitrate += ch.bitrate_kbps
+        for i in range(len(_CHANNEL_STATES)):
+            self._channel_totals[i] += self._channels[base + i]
+        self._bitrate[slot] = bitrate
+        self._bitrate_total += bitrate
+        cores = tuple(min(max(int(round(value)), 0), 100) for value in state.cpu_cores)
+        for value in cores:
+            self._core_hist[value] += 1
+        self._cores[slot] = cores
+
+    def remove(self, server_id: str):
+        slot = self._slots.pop(server_id, None)
+        if slot is None:
+            return
+        self._subtract(slot)
+        self._status[slot] = -1
+        self._ids[slot] = None
+        self._free.append(slot)
+
+    def _allocate(self, server_id: str) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = server_id
+        else:
+            slot = len(self._ids)
+            self._ids.append(server_id)
+            self._status.append(-1)
+            self._cpu_avg.append(_NAN)
+            self._bitrate.append(0)
+            self._channels.extend([0] * len(_CHANNEL_STATES))
+            self._cores.append(())
+        self._slots[server_id] = slot
+        return slot
+
+    def _subtract(self, slot: int):
+        """从合计中减去槽位当前的贡献并清空槽位"""
+        code = self._status[slot]
+        if code < 0:
+            return
+        self._status_totals[code] -= 1
+        if _STATUSES[code] is not ServerStatus.ONLINE:
+            return
+        self._online -= 1
+        base = slot * len(_CHANNEL_STATES)
+        for i in range(len(_CHANNEL_STATES)):
+            self._channel_totals[i] -= self._channels[base + i]
+            self._channels[base + i] = 0
+        self._bitrate_total -= self._bitrate[slot]
+        self._bitrate[slot] = 0
+        for value in self._cores[slot]:
+            self._core_hist[value] -= 1
+        self._cores[slot] = ()
+        self._cpu_avg[slot] = _NAN
+
+    def summary(self, top: int) -> dict:
+        """汇总结果（字段见 ClusterStatsResponse）"""
+        cpu_avg = self._cpu_avg
+        hottest = heapq.nlargest(
+            top, (i for i in range(len(cpu_avg)) if not math.isnan(cpu_avg[i])),
+            key=cpu_avg.__getitem__
+        )
+        max_bitrate = max(self._bitrate, default=0)
+        return {
+            "servers_total": len(self._slots),
+            "servers_by_status": {
+                status.value: count for status, count in zip(_STATUSES, self._status_totals)
+            },
+            "channels_total": sum(self._channel_totals),
+            "channels_by_state": {
+                state.value: count for state, count in zip(_CHANNEL_STATES, self._channel_totals)
+            },
+            "bitrate_total_kbps": self._bitrate_total,
+            "bitrate_avg_kbps": round(self._bitrate_total / self._online, 1) if self._online else None,
+            "bitrate_max_kbps": max_bitrate if self._online else None,
+            "cpu_cores": sum(self._core_hist),
+            "cpu_percentiles": self._percentiles(),
+            "hottest": [
+                {"server_id": self._ids[i], "cpu_avg": cpu_avg[i], "bitrate_kbps": self._bitrate[i]}
+                for i in hottest
+            ],
+        }
+
+    def _percentiles(self) -> dict[str, Optional[int]]:
+        """按最近秩从直方图取分位数；没有 CPU 数据时为 None"""
+        total = sum(self._core_hist)
+        result: dict[str, Optional[int]] = {f"p{p}": None for p in _PERCENTILES}
+        result["max"] = None
+        if not total:
+            return result
+        ranks = [(f"p{p}", max(1, math.ceil(total * p / 100))) for p in _PERCENTILES]
+        cumulative = 0
+        for value, count in enumerate(self._core_hist):
+            if not count:
+                continue
+            cumulative += count
+            while ranks and cumulative >= ranks[0][1]:
+                result[ranks.pop(0)[0]] = value
+            result["max"] = value
+        return result
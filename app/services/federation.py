@@ -0,0 +1,216 @@
+"""聚合模式：订阅各站点管理实例的状态推送，合并为一个集群视图"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+import httpx
+from pydantic import TypeAdapter
+from app.config import settings
+from app.models import (
+    ChannelAction, ChannelActionResult, ServerConfig, ServerResponse, SiteConfig, SiteStatus
+)
+from app.services.metrics import FEDERATION_EVENTS_TOTAL, FEDERATION_SITES_CONNECTED
+from app.services.poller import poller_service
+
+logger = logging.getLogger(__name__)
+
+_server_list_adapter = TypeAdapter(list[ServerResponse])
+_site_list_adapter = TypeAdapter(list[SiteConfig])
+
+class _Site:
+    """单个站点的连接状态与其服务器（ID 已加站点前缀，保持站点内顺序）"""
+    __slots__ = ("config", "servers", "connected_since", "last_event_at", "reconnects", "error", "task")
+
+    def __init__(self, config: SiteConfig):
+        self.config = config
+        self.servers: dict[str, ServerConfig] = {}
+        self.connected_since: Optional[datetime] = None
+        self.last_event_at: Optional[datetime] = None
+        self.reconnects = 0
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+class FederationService:
+    """
+    每个站点运行普通的管理实例，只轮询本地的 IPVTL 节点；聚合实例不直接访问任何 IPVTL：
+    - 订阅站点的 GET /api/servers/stream：连接时收到完整快照，之后只收到增量，跨机房流量只有变化部分
+    - 服务器ID加 "站点ID:" 前缀后合并到 PollerService，对外提供相同的 /api/servers 与推送接口
+    - 通道操作（含批量任务）转发到所属站点执行
+    - 站点断线期间其服务器保留最后已知状态并标记为过期，重连后以新的快照替换
+    告警、事件日志与看门狗在各站点运行；指标历史由收到的增量记录
+    """
+
+    def __init__(self):
+        self._sites: dict[str, _Site] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        FEDERATION_SITES_CONNECTED.set_callback(
+            lambda: sum(site.connected_since is not None for site in self._sites.values())
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return settings.federation_config_path is not None
+
+    async def start(self):
+        if not self.enabled:
+            return
+        self._load_sites()
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(
+            settings.federation_read_timeout, connect=settings.federation_connect_timeout
+        ))
+        for site in self._sites.values():
+            site.task = asyncio.create_task(self._site_loop(site))
+        logger.info(f"Federation aggregator started with {len(self._sites)} sites")
+
+    async def stop(self):
+        tasks = [site.task for site in self._sites.values() if site.task]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    def _load_sites(self):
+        path = Path(settings.federation_config_path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                sites = _site_list_adapter.validate_python(json.load(f).get("sites", []))
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Invalid sites config {path}: {e}")
+            return
+        self._sites = {site.id: _Site(site) for site in sites}
+
+    def status(self) -> list[SiteStatus]:
+        return [
+            SiteStatus(
+                id=site.config.id, name=site.config.name, url=site.config.url,
+                connected=site.connected_since is not None,
+                connected_since=site.connected_since, last_event_at=site.last_event_at,
+                servers_count=len(site.servers), reconnects=site.reconnects, error=site.error
+            )
+            for site in self._sites.values()
+        ]
+
+    def _route(self, server_id: str) -> Optional[tuple[_Site, str]]:
+        """聚合后的服务器ID -> (所属站点, 站点内的服务器ID)"""
+        site_id, sep, remote_id = server_id.partition(":")
+        site = self._sites.get(site_id)
+        if not sep or site is None:
+            return None
+        return site, remote_id
+
+    # ==================== 状态订阅 ====================
+
+    async def _site_loop(self, site: _Site):
+        """保持与站点的推送连接，断线后按指数退避重连"""
+        delay = 1.0
+        while True:
+            try:
+                async with self._client.stream(
+                    "GET", f"{site.config.url}/api/servers/stream"
+                ) as resp:
+                    resp.raise_for_status()
+                    await self._consume(site, resp)
+                site.error = "stream closed by site"
+            except httpx.HTTPError as e:
+                site.error = str(e) or type(e).__name__
+            except Exception as e:
+                site.error = str(e)
+                logger.error(f"Site {site.config.id} stream error: {e}")
+            if site.connected_since is not None:
+                # 已成功收到快照，重新开始退避
+                delay = 1.0
+                self._disconnected(site)
+            logger.warning(f"Site {site.config.id} disconnected: {site.error}; retrying in {delay:g}s")
+            await asyncio.sleep(delay)
+            site.reconnects += 1
+            delay = min(delay * 2, settings.federation_retry_max)
+
+    async def _consume(self, site: _Site, resp: httpx.Response):
+        """解析 SSE 消息流（站点每条消息只有一行 data）"""
+        event: Optional[str] = None
+        data: list[str] = []
+        async for line in resp.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].lstrip())
+            elif not line:
+                if event and data:
+                    self._on_event(site, event, "\n".join(data))
+                event, data = None, []
+
+    def _on_event(self, site: _Site, event: str, payload: str):
+        site.last_event_at = datetime.now()
+        if event == "snapshot":
+            self._on_snapshot(site, payload)
+        elif event == "delta":
+            delta = json.loads(payload)
+            delta["server_id"] = f"{site.config.id}:{delta['server_id']}"
+            poller_service.apply_site_delta(delta)
+        else:
+            # 告警、事件日志等由站点自行处理
+            return
+        FEDERATION_EVENTS_TOTAL.inc(site=site.config.id, event=event)
+
+    def _on_snapshot(self, site: _Site, payload: str):
+        responses = _server_list_adapter.validate_json(payload)
+        prefix = f"{site.config.id}:"
+        for r in responses:
+            r.config.id = r.state.server_id = prefix + r.config.id
+        site.servers = {r.config.id: r.config for r in responses}
+        if site.connected_since is None:
+            site.connected_since = datetime.now()
+            site.error = None
+            logger.info(f"Site {site.config.id} connected: {len(responses)} servers")
+        servers = {
+            sid: config for s in self._sites.values() for sid, config in s.servers.items()
+        }
+        poller_service.apply_site_snapshot(servers, responses)
+
+    def _disconnected(self, site: _Site):
+        """站点断线：保留其服务器的最后已知状态并标记为过期"""
+        site.connected_since = None
+        for sid in site.servers:
+            poller_service.apply_site_delta({"server_id": sid, "changes": {"stale": True}})
+
+    # ==================== 通道操作 ====================
+
+    async def channel_action(
+        self, server_id: str, channel_id: int, action: ChannelAction
+    ) -> ChannelActionResult:
+        """转发通道操作到所属站点（重启的等待与确认在站点完成）"""
+        route = self._route(server_id)
+        if route is None:
+            return ChannelActionResult(
+                success=False, message=f"Server not found: {server_id}",
+                channel_id=channel_id, server_id=server_id
+            )
+        site, remote_id = route
+        url = f"{site.config.url}/api/servers/{remote_id}/channels/{channel_id}/{action.value}"
+        try:
+            resp = await self._client.post(url, timeout=settings.federation_action_timeout)
+        except httpx.HTTPError as e:
+            return ChannelActionResult(
+                success=False, message=f"Site {site.config.id} unreachable: {e or type(e).__name__}",
+                channel_id=channel_id, server_id=server_id
+            )
+        try:
+            data = resp.json()
+        except ValueError:
+            data = {}
+        if resp.is_success:
+            result = ChannelActionResult(**data)
+            result.server_id = server_id
+            return result
+        return ChannelActionResult(
+            success=False, message=str(data.get("detail") or f"HTTP error: {resp.status_code}"),
+            channel_id=channel_id, server_id=server_id
+        )
+
+# 全局单例
+federation_service = FederationService()
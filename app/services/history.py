@@ -0,0 +1,139 @@
+"""指标历史服务（内存环形缓冲）"""
+import math
+import time
+from array import array
+from datetime import datetime
+from typing import Iterator, Optional
+from app.config import settings
+from app.models import HistoryMetric, HistoryPoint, ServerStatus
+from app.services.state_records import ServerRecord
+
+_NAN = float("nan")
+
+class ServerHistory:
+    """
+    单个服务器的历史数据
+    所有序列共享同一个时间戳环，每个序列为定长 float32 数组（缺失值为 NaN），
+    每个采样点每个序列仅占 4 字节。
+    采样按 interval 秒对齐分桶，同一时间段内后到的轮询覆盖之前的采样（保留最新值），
+    避免加速轮询（停止中、重启确认）缩短缓冲覆盖的时间范围
+    """
+    __slots__ = ("capacity", "interval", "head", "size", "times", "cpu_avg", "fps", "bitrate")
+
+    def __init__(self, capacity: int, interval: int):
+        self.capacity = capacity
+        self.interval = max(interval, 1)
+        self.head = 0  # 下一个写入位置
+        self.size = 0
+        self.times = array("I", [0]) * capacity  # Unix 时间戳(秒)
+        self.cpu_avg = self._new_column()
+        self.fps: dict[int, array] = {}
+        self.bitrate: dict[int, array] = {}
+
+    def _new_column(self) -> array:
+        return array("f", [_NAN]) * self.capacity
+
+    def append(self, ts: float, cpu_avg: Optional[float],
+               channels: list[tuple[int, Optional[float], Optional[int]]]):
+        """写入一个采样点: channels 为 (通道编号, fps, 码率kbps)；与上一个采样点在同一时间段内时覆盖该点"""
+        overwrite = bool(self.size) and int(ts) // self.interval == self.times[self.head - 1] // self.interval
+        i = (self.head - 1) % self.capacity if overwrite else self.head
+        self.times[i] = int(ts)
+        self.cpu_avg[i] = _NAN if cpu_avg is None else cpu_avg
+        seen = set()
+        for channel_id, fps, bitrate in channels:
+            seen.add(channel_id)
+            if channel_id not in self.fps:
+                self.fps[channel_id] = self._new_column()
+                self.bitrate[channel_id] = self._new_column()
+            self.fps[channel_id][i] = _NAN if fps is None else fps
+            self.bitrate[channel_id][i] = _NAN if bitrate is None else bitrate
+        # 本次未出现的通道记为缺失
+        for channel_id in self.fps.keys() - seen:
+            self.fps[channel_id][i] = _NAN
+            self.bitrate[channel_id][i] = _NAN
+        if overwrite:
+            return
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def column(self, metric: HistoryMetric, channel_id: Optional[int]) -> Optional[array]:
+        """获取指标对应的数据列"""
+        if metric == HistoryMetric.CPU_AVG:
+            return self.cpu_avg
+        columns = self.fps if metric == HistoryMetric.FPS else self.bitrate
+        return columns.get(channel_id)
+
+    def samples(self, column: array, start: float) -> Iterator[tuple[int, float]]:
+        """按时间顺序遍历 start 之后的有效采样"""
+        first = (self.head - self.size) % self.capacity
+        for n in range(self.size):
+            i = (first + n) % self.capacity
+            ts = self.times[i]
+            if ts < start:
+                continue
+            value = column[i]
+            if not math.isnan(value):
+                yield ts, value
+
+class HistoryService:
+    """按服务器保存 CPU/帧率/码率历史，并提供降采样查询"""
+
+    def __init__(self):
+        self._histories: dict[str, ServerHistory] = {}
+
+    def record(self, state: ServerRecord):
+        """记录一次轮询结果（离线时记录为缺失值）"""
+        history = self._histories.get(state.server_id)
+        if history is None:
+            history = ServerHistory(settings.history_capacity, settings.poll_interval)
+            self._histories[state.server_id] = history
+        if state.status is not ServerStatus.ONLINE:
+            # 轮询失败时状态中保留的是最后一次成功轮询的数据，不能作为当前值
+            history.append(time.time(), None, [])
+            return
+        channels = [(ch.id, ch.fps, ch.bitrate_kbps) for ch in state.channels]
+        history.append(time.time(), state.cpu_avg, channels)
+
+    def remove(self, server_id: str):
+        """删除服务器历史"""
+        self._histories.pop(server_id, None)
+
+    def query(
+        self, server_id: str, metric: HistoryMetric,
+        channel_id: Optional[int], range_seconds: int, step_seconds: int
+    ) -> list[HistoryPoint]:
+        """查询最近 range_seconds 内的数据，按 step_seconds 分桶计算 min/max/avg"""
+        history = self._histories.get(server_id)
+        if history is None:
+            return []
+        column = history.column(metric, channel_id)
+        if column is None:
+            return []
+        start = time.time() - range_seconds
+        # 桶按 step 对齐，便于客户端合并多次查询
+        origin = int(start) - int(start) % step_seconds
+        buckets: dict[int, list[float]] = {}
+        for ts, value in history.samples(column, start):
+            key = (ts - origin) // step_seconds
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [value, value, value, 1]
+            else:
+                if value < bucket[0]:
+                    bucket[0] = value
+                if value > bucket[1]:
+                    bucket[1] = value
+                bucket[2] += value
+                bucket[3] += 1
+        return [
+            HistoryPoint(
+                time=datetime.fromtimestamp(origin + key * step_seconds),
+                min=round(b[0], 2), max=round(b[1], 2),
+                avg=round(b[2] / b[3], 2), count=b[3]
+            )
+            for key, b in sorted(buckets.items())
+        ]
+
+# 全局单例
+history_service = HistoryService()
@@ -0,0 +1,18 @@
+"""IPVTL HTTP 客户端（轮询与通道操作共用的连接池配置）"""
+from typing import Optional
+import httpx
+from app.config import settings
+
+def create_client(timeout: Optional[float] = None) -> httpx.AsyncClient:
+    """
+    创建连接池客户端：空闲连接保活时间大于轮询间隔，
+    使每个端点在各轮询周期之间复用同一个连接。
+    httpcore 的保活连接数不超过 max_connections，连接数达到上限时会关闭其他端点的空闲连接，
+    因此默认不限制连接数、也不单独限制保活连接数，并发由调用方的信号量限制
+    """
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=None,
+        keepalive_expiry=settings.http_keepalive_expiry
+    )
+    return httpx.AsyncClient(timeout=timeout, limits=limits)
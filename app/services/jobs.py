@@ -0,0 +1,190 @@
+"""批量通道操作任务服务"""
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Optional
+from app.config import settings
+from app.models import (
+    BulkActionRequest, ChannelAction, ChannelActionResult,
+    ChannelTarget, JobInfo, JobState
+)
+from app.services.manager import manager_service
+from app.services.poller import poller_service
+from app.services.stream import stream_service
+
+logger = logging.getLogger(__name__)
+
+class JobService:
+    """批量/滚动通道操作：立即返回任务ID，后台并发执行"""
+
+    def __init__(self):
+        self._jobs: OrderedDict[str, JobInfo] = OrderedDict()
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._cancel_requested: set[str] = set()
+
+    async def stop(self):
+        """取消所有运行中的任务"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def resolve_targets(self, request: BulkActionRequest) -> list[ChannelTarget]:
+        """展开 targets 与 selector，按出现顺序去重"""
+        targets = list(request.targets)
+        selector = request.selector
+        if selector is not None:
+            server_ids = selector.server_ids or [config.id for config, _ in poller_service.get_all_servers()]
+            channel_ids = set(selector.channel_ids) if selector.channel_ids else None
+            for sid in server_ids:
+                server_info = poller_service.get_server(sid)
+                if not server_info:
+                    continue
+                _, state = server_info
+                for ch in state.channels:
+                    if channel_ids is not None and ch.id not in channel_ids:
+                        continue
+                    if selector.state is not None and ch.state != selector.state:
+                        continue
+                    targets.append(ChannelTarget(server_id=sid, channel_id=ch.id))
+        seen = set()
+        unique = []
+        for target in targets:
+            key = (target.server_id, target.channel_id)
+            if key not in seen:
+                seen.add(key)
+                unique.append(target)
+        return unique
+
+    def submit(self, request: BulkActionRequest) -> JobInfo:
+        """创建并启动批量任务"""
+        targets = self.resolve_targets(request)
+        if not targets:
+            raise ValueError("No channels matched")
+        batch_size = request.batch_size or len(targets)
+        job = JobInfo(
+            id=uuid.uuid4().hex[:12],
+            action=request.action,
+            created_at=datetime.now(),
+            total=len(targets),
+            batches=-(-len(targets) // batch_size)
+        )
+        self._jobs[job.id] = job
+        self._trim()
+        task = asyncio.create_task(self._run(job, request, targets, batch_size))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._finish(job.id))
+        logger.info(f"Job {job.id}: {request.action.value} on {len(targets)} channels")
+        return job
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        """获取任务"""
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list[JobInfo]:
+        """任务列表（最新在前）"""
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务：已开始的操作会执行完毕（避免通道停在重启中途），后续操作不再发起"""
+        if job_id not in self._tasks:
+            return False
+        self._cancel_requested.add(job_id)
+        return True
+
+    def _finish(self, job_id: str):
+        self._tasks.pop(job_id, None)
+        self._cancel_requested.discard(job_id)
+
+    def _trim(self):
+        """只保留最近的任务，运行中的任务不会被淘汰"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= settings.job_history_size:
+                break
+            if job_id not in self._tasks:
+                del self._jobs[job_id]
+
+    async def _run(
+        self, job: JobInfo, request: BulkActionRequest,
+        targets: list[ChannelTarget], batch_size: int
+    ):
+        """按批次执行，批内受全局和单服务器并发限制"""
+        global_limit = asyncio.Semaphore(request.max_concurrent or settings.job_max_concurrent)
+        per_server = request.per_server_concurrent or settings.job_per_server_concurrent
+        server_limits: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(per_server)
+        )
+        job.state = JobState.RUNNING
+        job.started_at = datetime.now()
+        self._publish(job)
+        try:
+            for index in range(job.batches):
+                batch = targets[index * batch_size:(index + 1) * batch_size]
+                if index and request.batch_pause:
+                    await asyncio.sleep(request.batch_pause)
+                if job.id in self._cancel_requested:
+                    break
+                job.current_batch = index + 1
+                failed_before = job.failed
+                await asyncio.gather(*(
+                    self._run_one(job, request.action, target, global_limit,
+                                  server_limits[target.server_id])
+                    for target in batch
+                ))
+                if request.abort_on_failure and job.failed > failed_before:
+                    logger.warning(f"Job {job.id}: batch {index + 1} had failures, aborting")
+                    break
+            if job.id in self._cancel_requested:
+                job.state = JobState.CANCELLED
+                logger.info(f"Job {job.id} cancelled")
+            else:
+                job.state = JobState.COMPLETED
+        except asyncio.CancelledError:
+            job.state = JobState.CANCELLED
+            logger.info(f"Job {job.id} cancelled")
+        finally:
+            job.finished_at = datetime.now()
+            self._publish(job)
+
+    async def _run_one(
+        self, job: JobInfo, action: ChannelAction, target: ChannelTarget,
+        global_limit: asyncio.Semaphore, server_limit: asyncio.Semaphore
+    ):
+        """执行单个通道操作并更新进度"""
+        async with server_limit, global_limit:
+            if job.id in self._cancel_requested:
+                return
+            try:
+                result = await self._execute(action, target)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result = ChannelActionResult(
+                    success=False, message=str(e),
+                    channel_id=target.channel_id, server_id=target.server_id
+                )
+        job.results.append(result)
+        job.completed += 1
+        if result.success:
+            job.succeeded += 1
+        else:
+            job.failed += 1
+        self._publish(job)
+
+    @staticmethod
+    async def _execute(action: ChannelAction, target: ChannelTarget) -> ChannelActionResult:
+        if action == ChannelAction.START:
+            return await manager_service.start_channel(target.server_id, target.channel_id)
+        if action == ChannelAction.STOP:
+            return await manager_service.stop_channel(target.server_id, target.channel_id)
+        return await manager_service.restart_channel(target.server_id, target.channel_id)
+
+    @staticmethod
+    def _publish(job: JobInfo):
+        """通过实时推送广播任务进度（不含明细结果）"""
+        stream_service.publish("job", job.model_dump(mode="json", exclude={"results"}))
+
+# 全局单例
+job_service = JobService()
@@ -0,0 +1,313 @@
+"""事件日志：记录通道状态变化、帧率骤降与服务器上下线"""
+import asyncio
+import fcntl
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from app.config import settings
+from app.models import ChannelState, EventType, JournalEvent, ServerStatus
+from app.services.shared_state import shared_state_service
+from app.services.state_records import PollChanges, ServerRecord
+from app.services.stream import Subscriber, stream_service
+
+logger = logging.getLogger(__name__)
+
+class JournalService:
+    """
+    轮询结果与上次结果比较得到事件：
+    - 记录操作只追加到内存缓冲，由后台任务批量写入磁盘（在线程中执行，不阻塞轮询）
+    - 文件按大小轮转: events.jsonl -> events.jsonl.1 -> ... -> events.jsonl.N
+    - 实时事件同时推送给 /api/events/stream 订阅者及 /api/servers/stream 的 event 事件
+    多进程部署时只有轮询主进程记录事件；其他 worker 从日志文件查询，并跟踪文件中新写入的事件
+    推送给本进程的订阅者（因此需要设置 journal_path，事件在主进程写入磁盘后可见）。
+    写入与轮转持有日志文件旁的 .lock 文件锁，主进程交接期间新旧主进程不会同时轮转
+    """
+
+    def __init__(self):
+        self._recent: deque[JournalEvent] = deque(maxlen=settings.journal_memory_size)
+        self._pending: list[JournalEvent] = []
+        self._subscribers: set[Subscriber] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        # 非主进程跟踪日志文件的位置 (inode, 偏移)
+        self._follow_pos: Optional[tuple[int, int]] = None
+
+    @property
+    def enabled(self) -> bool:
+        """是否写入磁盘"""
+        return settings.journal_path is not None
+
+    @property
+    def _path(self) -> Path:
+        return Path(settings.journal_path)
+
+    @property
+    def _following(self) -> bool:
+        """多进程部署中的非主进程：事件由主进程写入日志文件"""
+        return shared_state_service.enabled and not shared_state_service.is_leader
+
+    async def start(self):
+        if self.enabled:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """停止后台写入并写出剩余事件"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self._flush()
+        for sub in list(self._subscribers):
+            self.unsubscribe(sub)
+            try:
+                sub.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+    # ==================== 事件检测 ====================
+
+    def record_poll(
+        self, state: ServerRecord, polled_before: bool,
+        old_status: ServerStatus, changes: PollChanges
+    ):
+        """根据一次轮询带来的变化记录事件（首次轮询没有可比较的状态，不记录）"""
+        if not polled_before:
+            return
+        now = state.last_poll_time or datetime.now()
+        sid = state.server_id
+        if state.status != old_status:
+            if state.status == ServerStatus.ONLINE:
+                self.record(JournalEvent(
+                    time=now, type=EventType.SERVER_ONLINE, server_id=sid,
+                    previous=old_status.value, current=state.status.value
+                ))
+            elif old_status == ServerStatus.ONLINE:
+                self.record(JournalEvent(
+                    time=now, type=EventType.SERVER_OFFLINE, server_id=sid,
+                    previous=old_status.value, current=state.status.value,
+                    message=state.error_message
+                ))
+        if state.status != ServerStatus.ONLINE:
+            return
+        drop_ratio = settings.journal_fps_drop_ratio
+        for ch, old_state, old_fps in changes.channels:
+            if ch.state != old_state:
+                self.record(JournalEvent(
+                    time=now, type=EventType.CHANNEL_STATE, server_id=sid, channel_id=ch.id,
+                    previous=old_state.value, current=ch.state.value
+                ))
+            elif (ch.state == ChannelState.RUNNING and ch.fps is not None and old_fps
+                  and ch.fps < old_fps * (1 - drop_ratio)):
+                self.record(JournalEvent(
+                    time=now, type=EventType.FPS_DROP, server_id=sid, channel_id=ch.id,
+                    previous=old_fps, current=ch.fps
+                ))
+
+    def record(self, event: JournalEvent):
+        """记录事件（只追加到内存，不做 I/O）"""
+        self._recent.append(event)
+        if self.enabled:
+            self._pending.append(event)
+        self._deliver(event)
+
+    def _deliver(self, event: JournalEvent):
+        """推送给实时订阅者"""
+        stream_service.publish("event", event.model_dump(mode="json", exclude_none=True))
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning("Event subscriber too slow, dropping connection")
+                self.unsubscribe(sub)
+
+    # ==================== 实时订阅 ====================
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(settings.stream_queue_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        sub.closed = True
+        self._subscribers.discard(sub)
+
+    # ==================== 写入 ====================
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.journal_flush_interval)
+            await self._flush()
+            if self._following:
+                await self._follow()
+            else:
+                self._follow_pos = None
+
+    async def _follow(self):
+        """读取主进程新写入的事件，只加入内存并推送，不再写入"""
+        try:
+            events = await asyncio.to_thread(self._read_new)
+        except Exception as e:
+            logger.error(f"Failed to follow journal {self._path}: {e}")
+            return
+        for event in events:
+            self._recent.append(event)
+            self._deliver(event)
+
+    def _read_new(self) -> list[JournalEvent]:
+        """读取上次位置之后的新事件（在线程中执行）；首次调用只记录当前位置，不读取历史事件"""
+        path = self._path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines: list[bytes] = []
+        with self._locked():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # 尚未写入：文件创建后从头读取
+                self._follow_pos = (0, 0)
+                return []
+            if self._follow_pos is None:
+                self._follow_pos = (stat.st_ino, stat.st_size)
+                return []
+            inode, offset = self._follow_pos
+            if inode != stat.st_ino:
+                # 已轮转：先读完旧文件（此时为 .1）的剩余部分，新文件从头读取
+                rotated = path.with_name(f"{path.name}.1")
+                try:
+                    if rotated.stat().st_ino == inode:
+                        lines.extend(self._read_from(rotated, offset)[0])
+                except FileNotFoundError:
+                    pass
+                offset = 0
+            new_lines, offset = self._read_from(path, offset)
+            lines.extend(new_lines)
+            self._follow_pos = (stat.st_ino, offset)
+        events = []
+        for line in lines:
+            try:
+                events.append(JournalEvent.model_validate_json(line))
+            except ValueError:
+                continue
+        return events
+
+    @staticmethod
+    def _read_from(path: Path, offset: int) -> tuple[list[bytes], int]:
+        """从 offset 读取完整的行，返回这些行与新的偏移"""
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        return data[:end].splitlines(), offset + end
+
+    def _locked(self):
+        """日志文件锁（写入、轮转与跟踪读取互斥）"""
+        return _FileLock(self._path.with_name(self._path.name + ".lock"))
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} journal events: {e}")
+
+    def _write(self, batch: list[JournalEvent]):
+        """追加一批事件（在线程中执行）"""
+        data = "".join(e.model_dump_json(exclude_none=True) + "\n" for e in batch).encode()
+        path = self._path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size and size + len(data) > settings.journal_max_bytes:
+                self._rotate()
+            with open(path, "ab") as f:
+                f.write(data)
+
+    def _rotate(self):
+        path = self._path
+        for i in range(settings.journal_backups, 0, -1):
+            src = path if i == 1 else path.with_name(f"{path.name}.{i - 1}")
+            if src.exists():
+                os.replace(src, path.with_name(f"{path.name}.{i}"))
+        if settings.journal_backups <= 0:
+            path.unlink(missing_ok=True)
+
+    # ==================== 查询 ====================
+
+    async def query(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        server_id: Optional[str] = None,
+        channel_id: Optional[int] = None,
+        types: Optional[list[EventType]] = None,
+        limit: int = 1000
+    ) -> list[JournalEvent]:
+        """按时间范围与服务器/通道/类型筛选，按时间升序返回最近的 limit 条"""
+        def matches(e: JournalEvent) -> bool:
+            return (e.time >= start and (end is None or e.time < end)
+                    and (server_id is None or e.server_id == server_id)
+                    and (channel_id is None or e.channel_id == channel_id)
+                    and (not types or e.type in types))
+
+        if not self.enabled or (self._recent and self._recent[0].time <= start
+                                and len(self._recent) == self._recent.maxlen):
+            # 内存中的事件已覆盖查询范围
+            events = [e for e in self._recent if matches(e)]
+        else:
+            events = await asyncio.to_thread(self._read, start, end, matches)
+            events.extend(e for e in self._pending if matches(e))
+        return events[-limit:]
+
+    def _read(self, start: datetime, end: Optional[datetime], matches) -> list[JournalEvent]:
+        """从旧到新读取日志文件；最后修改时间早于 start 的轮转文件直接跳过"""
+        path = self._path
+        files = [path.with_name(f"{path.name}.{i}") for i in range(settings.journal_backups, 0, -1)]
+        files.append(path)
+        events = []
+        for file in files:
+            try:
+                if datetime.fromtimestamp(file.stat().st_mtime) < start:
+                    continue
+                with open(file, "rb") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                continue
+            for line in lines:
+                try:
+                    event = JournalEvent.model_validate_json(line)
+                except ValueError:
+                    continue
+                if end is not None and event.time >= end:
+                    break
+                if matches(event):
+                    events.append(event)
+        return events
+
+class _FileLock:
+    """fcntl 排他锁（阻塞，持有时间只有一次写入）"""
+    __slots__ = ("path", "fd")
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        return False
+
+# 全局单例
+journal_service = JournalService()
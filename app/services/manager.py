@@ -1,11 +1,18 @@
 """通道管理服务"""
 import asyncio
 import logging
-from typing import Optional
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Optional
 import httpx
 from app.config import settings
-from app.models import ChannelActionResult
+from app.models import ChannelAction, ChannelActionResult, ChannelState, ServerConfig
+from app.services.breaker import breaker_service
+from app.services.federation import federation_service
+from app.services.http_client import create_client
+from app.services.metrics import ACTION_SECONDS
 from app.services.poller import poller_service
+from app.services.tracing import tracing_service
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +21,23 @@ class ManagerService:
     
     def __init__(self):
         self._client: Optional[httpx.AsyncClient] = None
+        # 按端点限制并发请求，避免批量操作压垮单台 IPVTL
+        self._host_limits: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(settings.channel_per_host_concurrent)
+        )
+        self._action_listener: Optional[Callable[[str, int, ChannelAction], None]] = None
+    
+    def set_action_listener(self, listener: Callable[[str, int, ChannelAction], None]):
+        """注册通道操作发起时的回调 (server_id, channel_id, 操作)"""
+        self._action_listener = listener
+    
+    def _notify_action(self, server_id: str, channel_id: int, action: ChannelAction):
+        if self._action_listener is not None:
+            self._action_listener(server_id, channel_id, action)
     
     async def start(self):
         """启动管理服务"""
-        self._client = httpx.AsyncClient()
+        self._client = create_client()
         logger.info("Manager service started")
     
     async def stop(self):
@@ -31,17 +51,44 @@ class ManagerService:
         启动指定通道
         API: GET /channel{id}?start
         """
-        return await self._channel_action(server_id, channel_id, "start")
+        self._notify_action(server_id, channel_id, ChannelAction.START)
+        return await self._timed("start", server_id, channel_id, self._channel_action(server_id, channel_id, "start"))
     
     async def stop_channel(self, server_id: str, channel_id: int) -> ChannelActionResult:
         """
         停止指定通道
         API: GET /channel{id}?stop
         """
-        return await self._channel_action(server_id, channel_id, "stop")
+        self._notify_action(server_id, channel_id, ChannelAction.STOP)
+        return await self._timed("stop", server_id, channel_id, self._channel_action(server_id, channel_id, "stop"))
+    
+    @staticmethod
+    async def _timed(
+        action: str, server_id: str, channel_id: int, operation: Awaitable[ChannelActionResult]
+    ) -> ChannelActionResult:
+        """记录操作耗时指标与追踪"""
+        started = time.perf_counter()
+        with tracing_service.trace(f"channel_{action}", server_id=server_id, channel_id=channel_id):
+            result = await operation
+            tracing_service.annotate(success=result.success)
+        ACTION_SECONDS.observe(
+            time.perf_counter() - started,
+            action=action, outcome="success" if result.success else "failure"
+        )
+        return result
     
     async def restart_channel(self, server_id: str, channel_id: int) -> ChannelActionResult:
         """重启指定通道（先停后启）"""
+        self._notify_action(server_id, channel_id, ChannelAction.RESTART)
+        return await self._timed("restart", server_id, channel_id, self._restart_channel(server_id, channel_id))
+    
+    async def _restart_channel(self, server_id: str, channel_id: int) -> ChannelActionResult:
+        """
+        停止后轮询 /status 直到通道空闲再启动，启动后确认进入运行状态；
+        结果中 timings 记录各阶段耗时(秒)
+        """
+        if federation_service.enabled:
+            return await federation_service.channel_action(server_id, channel_id, ChannelAction.RESTART)
         server_info = poller_service.get_server(server_id)
         if not server_info:
             return ChannelActionResult(
@@ -52,31 +99,41 @@ class ManagerService:
             )
         
         config, _ = server_info
+        timings: dict[str, float] = {}
         
         try:
             # 1. 停止通道
             logger.info(f"Stopping channel {channel_id} on {config.name}")
-            stop_url = f"{config.base_url}/channel{channel_id}?stop"
-            stop_resp = await self._client.get(stop_url, timeout=settings.channel_stop_timeout)
-            stop_resp.raise_for_status()
+            started = time.monotonic()
+            await self._request(config, f"/channel{channel_id}?stop", settings.channel_stop_timeout)
+            timings["stop"] = round(time.monotonic() - started, 3)
             
-            # 2. 等待通道完全停止
-            await asyncio.sleep(settings.channel_restart_delay)
+            # 2. 等待通道空闲
+            started = time.monotonic()
+            await self._wait_for_state(
+                server_id, channel_id, ChannelState.IDLE, settings.channel_stop_timeout
+            )
+            timings["wait_idle"] = round(time.monotonic() - started, 3)
             
             # 3. 启动通道
             logger.info(f"Starting channel {channel_id} on {config.name}")
-            start_url = f"{config.base_url}/channel{channel_id}?start"
-            start_resp = await self._client.get(start_url, timeout=settings.channel_start_timeout)
-            start_resp.raise_for_status()
+            started = time.monotonic()
+            await self._request(config, f"/channel{channel_id}?start", settings.channel_start_timeout)
+            timings["start"] = round(time.monotonic() - started, 3)
             
-            # 4. 刷新状态
-            await poller_service.poll_server(server_id)
+            # 4. 确认进入运行状态（轮询结果同时刷新了缓存状态）
+            started = time.monotonic()
+            await self._wait_for_state(
+                server_id, channel_id, ChannelState.RUNNING, settings.channel_start_timeout
+            )
+            timings["wait_running"] = round(time.monotonic() - started, 3)
             
             return ChannelActionResult(
                 success=True,
                 message="Channel restarted successfully",
                 channel_id=channel_id,
-                server_id=server_id
+                server_id=server_id,
+                timings=timings
             )
             
         except httpx.HTTPStatusError as e:
@@ -84,16 +141,63 @@ class ManagerService:
             logger.error(f"Restart channel {channel_id} failed: {msg}")
             return ChannelActionResult(
                 success=False, message=msg,
-                channel_id=channel_id, server_id=server_id
+                channel_id=channel_id, server_id=server_id, timings=timings
             )
         except Exception as e:
             msg = str(e)
             logger.error(f"Restart channel {channel_id} failed: {msg}")
             return ChannelActionResult(
                 success=False, message=msg,
-                channel_id=channel_id, server_id=server_id
+                channel_id=channel_id, server_id=server_id, timings=timings
             )
     
+    async def _request(self, config: ServerConfig, path: str, timeout: float) -> httpx.Response:
+        """向 IPVTL 发送操作请求（受断路器与单端点并发限制）"""
+        endpoint = config.base_url
+        # 冷却结束后只有一个请求（轮询或操作）作为探测发出，结果决定断路器是否关闭
+        breaker_service.acquire(endpoint)
+        wait_started = time.perf_counter()
+        async with self._host_limits[endpoint]:
+            tracing_service.add_span("host_limit_wait", wait_started)
+            with tracing_service.span("request", path=path):
+                try:
+                    resp = await self._client.get(
+                        f"{endpoint}{path}", timeout=timeout,
+                        extensions=tracing_service.httpx_trace()
+                    )
+                except httpx.TransportError:
+                    breaker_service.record_failure(endpoint)
+                    raise
+        breaker_service.record_success(endpoint)
+        resp.raise_for_status()
+        return resp
+    
+    async def _wait_for_state(
+        self, server_id: str, channel_id: int, target: ChannelState, timeout: float
+    ):
+        """按 channel_ready_poll_interval 轮询该服务器 /status，直到通道进入目标状态"""
+        with tracing_service.span(f"wait_{target.value}"):
+            await self._poll_until(server_id, channel_id, target, timeout)
+    
+    async def _poll_until(
+        self, server_id: str, channel_id: int, target: ChannelState, timeout: float
+    ):
+        deadline = time.monotonic() + timeout
+        endpoint = poller_service.get_server(server_id)[0].base_url
+        while True:
+            # 等待期间端点不可达时不再空等到超时
+            breaker_service.check(endpoint)
+            state = await poller_service.poll_server(server_id, max_age=0)
+            current = next((ch.state for ch in state.channels if ch.id == channel_id), None)
+            if current == target:
+                return
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Channel {channel_id} not {target.value} after {timeout:g}s "
+                    f"(current: {current.value if current else state.status.value})"
+                )
+            await asyncio.sleep(settings.channel_ready_poll_interval)
+    
     async def _channel_action(
         self, server_id: str, channel_id: int, action: str
     ) -> ChannelActionResult:
@@ -101,7 +205,10 @@ class ManagerService:
         执行通道操作
         action: "start" | "stop"
         API: GET /channel{id}?{action}
+        聚合模式下转发到所属站点
         """
+        if federation_service.enabled:
+            return await federation_service.channel_action(server_id, channel_id, ChannelAction(action))
         server_info = poller_service.get_server(server_id)
         if not server_info:
             return ChannelActionResult(
@@ -120,14 +227,13 @@ class ManagerService:
         
         try:
             # 构建 URL: /channel{id}?start 或 /channel{id}?stop
-            url = f"{config.base_url}/channel{channel_id}?{action}"
-            logger.info(f"Executing {action} on channel {channel_id}: {url}")
+            path = f"/channel{channel_id}?{action}"
+            logger.info(f"Executing {action} on channel {channel_id}: {config.base_url}{path}")
             
-            resp = await self._client.get(url, timeout=timeout)
-            resp.raise_for_status()
+            await self._request(config, path, timeout)
             
-            # 刷新服务器状态
-            await poller_service.poll_server(server_id)
+            # 刷新服务器状态（操作已改变状态，不使用缓存结果）
+            await poller_service.poll_server(server_id, max_age=0)
             
             return ChannelActionResult(
                 success=True,
@@ -0,0 +1,260 @@
+"""运行指标（Prometheus 文本格式）"""
+import math
+import time
+from typing import Callable, Iterable, Optional
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+class Gauge(_Metric):
+    """瞬时值；可提供回调在采集时计算"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def set_callback(self, callback: Callable[[], float]):
+        self._callback = callback
+
+    def _samples(self) -> list[str]:
+        if self._callback is not None:
+            return [f"{self.name} {_format_value(self._callback())}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+class Histogram(_Metric):
+    """累积分桶直方图"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每个标签组合: [各桶计数..., +Inf 计数], 总和
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        if not self.labelnames:
+            self._new_series(())
+
+    def _new_series(self, key: tuple[str, ...]) -> tuple[list[int], list[float]]:
+        series = ([0] * (len(self.buckets) + 1), [0.0])
+        self._series[key] = series
+        return series
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key) or self._new_series(key)
+        counts, total = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="+Inf"' if math.isinf(bound) else f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# 全局单例
+metrics_registry = MetricsRegistry()
+
+# ==================== 轮询 ====================
+POLL_REQUEST_SECONDS = metrics_registry.histogram(
+    "ipvtl_poll_request_seconds", "IPVTL /status round-trip time", ["endpoint", "outcome"]
+)
+POLL_JSON_PARSE_SECONDS = metrics_registry.histogram(
+    "ipvtl_poll_json_parse_seconds", "Time spent decoding /status JSON",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+POLL_SEMAPHORE_WAIT_SECONDS = metrics_registry.histogram(
+    "ipvtl_poll_semaphore_wait_seconds", "Time waiting for a poll concurrency slot"
+)
+POLL_TOTAL = metrics_registry.counter(
+    "ipvtl_poll_total", "Polls by outcome", ["outcome"]
+)
+POLL_LAG_SECONDS = metrics_registry.histogram(
+    "ipvtl_poll_lag_seconds", "Delay between a server's due time and its poll start",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+)
+POLL_LATE_TOTAL = metrics_registry.counter(
+    "ipvtl_poll_late_total", "Scheduled polls started more than 1s after their due time"
+)
+POLL_SKIPPED_TOTAL = metrics_registry.counter(
+    "ipvtl_poll_skipped_total", "Scheduled polls skipped", ["reason"]
+)
+POLL_OLDEST_AGE_SECONDS = metrics_registry.gauge(
+    "ipvtl_poll_oldest_age_seconds", "Age of the least recently polled server"
+)
+
+# ==================== 断路器 ====================
+BREAKER_TRANSITIONS_TOTAL = metrics_registry.counter(
+    "ipvtl_breaker_transitions_total", "Circuit breaker state transitions", ["state"]
+)
+
+# ==================== 通道操作 ====================
+ACTION_SECONDS = metrics_registry.histogram(
+    "ipvtl_channel_action_seconds", "Channel action latency", ["action", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+
+# ==================== 看门狗 ====================
+WATCHDOG_RESTARTS_TOTAL = metrics_registry.counter(
+    "ipvtl_watchdog_restarts_total", "Watchdog channel restarts by outcome", ["outcome"]
+)
+
+# ==================== 告警 ====================
+ALERTS_FIRING = metrics_registry.gauge(
+    "ipvtl_alerts_firing", "Alerts currently firing"
+)
+ALERT_NOTIFICATIONS_TOTAL = metrics_registry.counter(
+    "ipvtl_alert_notifications_total", "Alert notifications queued", ["state"]
+)
+ALERT_WEBHOOK_TOTAL = metrics_registry.counter(
+    "ipvtl_alert_webhook_total", "Alert webhook deliveries by outcome", ["outcome"]
+)
+
+# ==================== 聚合模式 ====================
+FEDERATION_SITES_CONNECTED = metrics_registry.gauge(
+    "ipvtl_federation_sites_connected", "Sites with an open state stream"
+)
+FEDERATION_EVENTS_TOTAL = metrics_registry.counter(
+    "ipvtl_federation_events_total", "State stream events received from sites", ["site", "event"]
+)
+
+# ==================== API ====================
+HTTP_REQUEST_SECONDS = metrics_registry.histogram(
+    "ipvtl_http_request_seconds", "API request latency", ["method", "route", "status"]
+)
+
+class MetricsMiddleware:
+    """ASGI 中间件：按路由模板记录请求耗时（SSE 长连接不记录）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+        streaming = [False]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                streaming[0] = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not streaming[0]:
+                route = scope.get("route")
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"],
+                    route=getattr(route, "path_format", "other"),
+                    status=status[0]
+                )
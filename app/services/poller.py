@@ -1,164 +1,893 @@
 """状态轮询服务"""
 import asyncio
+import heapq
 import json
 import logging
+import os
+import random
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 import httpx
+from pydantic import TypeAdapter
+from pydantic_core import to_json
 from app.config import settings
 from app.models import (
-    ServerConfig, ServerState, ServerStatus,
-    ChannelInfo, ChannelState
+    ServerConfig, ServerStatus, ChannelState, CircuitState, ServerResponse
 )
+from app.services.alerts import alert_service
+from app.services.breaker import breaker_service
+from app.services.channel_index import ChannelIndex
+from app.services.cluster_stats import ClusterStats
+from app.services.history import history_service
+from app.services.journal import journal_service
+from app.services.http_client import create_client
+from app.services.metrics import (
+    POLL_JSON_PARSE_SECONDS, POLL_LAG_SECONDS, POLL_LATE_TOTAL,
+    POLL_OLDEST_AGE_SECONDS, POLL_REQUEST_SECONDS, POLL_SEMAPHORE_WAIT_SECONDS,
+    POLL_SKIPPED_TOTAL, POLL_TOTAL
+)
+from app.services.shared_state import SharedSnapshot, shared_state_service
+from app.services.server_index import ServerIndex
+from app.services.snapshot import CachedBody, snapshot_cache
+from app.services.state_store import state_store_service
+from app.services.state_records import ChannelRecord, PollChanges, ServerRecord
+from app.services.stream import stream_service
+from app.services.tracing import tracing_service
 
 logger = logging.getLogger(__name__)
 
+_server_list_adapter = TypeAdapter(list[ServerResponse])
+
+def _encode_json(content) -> bytes:
+    """编码状态字典（输出与 model_dump_json 一致，跳过模型构建）"""
+    return to_json(content)
+
+# 调度轮询开始时间晚于到期时间超过该值(秒)即计为延迟
+_LATE_THRESHOLD = 1.0
+
 class PollerService:
     """服务器状态轮询服务"""
     
     def __init__(self):
         self._servers: dict[str, ServerConfig] = {}
-        self._states: dict[str, ServerState] = {}
+        # 端点(base_url) -> 使用该端点的服务器ID；轮询、调度与失败计数均按端点进行
+        self._endpoints: dict[str, list[str]] = {}
+        self._states: dict[str, ServerRecord] = {}
         self._client: Optional[httpx.AsyncClient] = None
         self._poll_task: Optional[asyncio.Task] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._persist_task: Optional[asyncio.Task] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._config_stamp_seen: Optional[tuple[int, int]] = None
         self._semaphore = asyncio.Semaphore(settings.poll_max_concurrent)
+        # 调度器：(到期时间, 端点) 小顶堆，_next_due 为权威值，用于识别过期条目
+        self._schedule: list[tuple[float, str]] = []
+        self._next_due: dict[str, float] = {}
+        self._failures: dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self._poll_tasks: set[asyncio.Task] = set()
+        # 单飞：同一服务器的并发轮询共享一次上游请求；值为 (发起时间 monotonic, 任务)
+        self._inflight: dict[str, tuple[float, asyncio.Task]] = {}
+        # 等待调度轮询结果的端点：每个调度周期一次结果计入告警的 for_polls（手动刷新不计）
+        self._scheduled_pending: set[str] = set()
+        self._polled_at: dict[str, float] = {}
+        # 状态版本：仅在轮询结果或配置发生变化时递增（见 _next_version）
+        self._version = 0
+        self._server_versions: dict[str, int] = {}
+        # 二级索引：随状态变化增量维护，用于服务器列表筛选
+        self._index = ServerIndex()
+        # 全集群统计：与索引同时增量更新
+        self._stats = ClusterStats()
+        # 通道索引：用于跨服务器通道查询，轮询只更新变化的通道
+        self._channel_index = ChannelIndex()
+        self._poll_listener: Optional[Callable[[ServerConfig, ServerRecord], None]] = None
+        POLL_OLDEST_AGE_SECONDS.set_callback(self._oldest_poll_age)
+        breaker_service.set_listener(self._on_circuit_change)
+    
+    def set_poll_listener(self, listener: Callable[[ServerConfig, ServerRecord], None]):
+        """注册每次轮询结果写入后的回调（供依赖本服务的模块使用，避免循环导入）"""
+        self._poll_listener = listener
     
     async def start(self):
-        """启动轮询服务"""
+        """启动轮询服务（不等待首次轮询完成）"""
+        if self.federated:
+            # 服务器列表与状态由 FederationService 从各站点获取
+            logger.info("Poller running as federation aggregator, not polling")
+            return
         self._load_servers()
-        self._client = httpx.AsyncClient(timeout=settings.poll_timeout)
-        # 立即执行一次轮询
-        await self._poll_all()
-        # 启动定时轮询
-        self._poll_task = asyncio.create_task(self._poll_loop())
+        if state_store_service.enabled:
+            self._restore_state_snapshot()
+        self._client = create_client(timeout=settings.poll_timeout)
+        if shared_state_service.enabled and not shared_state_service.try_acquire():
+            # 多进程部署中的非主进程：只读取主进程发布的快照
+            logger.info("Poller running as follower, reading shared state")
+        else:
+            # 首次全量轮询在后台执行，期间对外提供快照中的过期数据
+            self._start_polling(initial_sweep=True)
+        if shared_state_service.enabled:
+            self._sync_task = asyncio.create_task(self._shared_state_loop())
+        if state_store_service.enabled:
+            self._persist_task = asyncio.create_task(self._persist_loop())
+        if settings.servers_watch_interval > 0:
+            self._watch_task = asyncio.create_task(self._watch_config_loop())
         logger.info(f"Poller started, monitoring {len(self._servers)} servers")
     
+    def _oldest_poll_age(self) -> float:
+        """最久未轮询的服务器距今秒数（用于发现轮询滞后；非轮询进程只有手动刷新，不统计）"""
+        if not self._polled_at or not self.is_polling_process:
+            return 0.0
+        return time.monotonic() - min(self._polled_at.values())
+    
+    def _start_polling(self, initial_sweep: bool = False):
+        """启动定时轮询（各服务器错峰分布在一个周期内）"""
+        self._poll_task = asyncio.create_task(self._run_polling(initial_sweep))
+    
+    async def _run_polling(self, initial_sweep: bool):
+        if initial_sweep:
+            await self._poll_all()
+        self._schedule_all()
+        await self._poll_loop()
+    
     async def stop(self):
         """停止轮询服务"""
+        for task in (self._sync_task, self._persist_task, self._watch_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        if state_store_service.enabled and self.is_polling_process:
+            try:
+                await asyncio.to_thread(state_store_service.save, self.snapshot_json().body)
+            except Exception as e:
+                logger.error(f"Failed to save state snapshot: {e}")
+        shared_state_service.release()
         if self._poll_task:
             self._poll_task.cancel()
             try:
                 await self._poll_task
             except asyncio.CancelledError:
                 pass
+        # 调度轮询只是共享轮询的等待方（shield），进行中的上游请求需要单独取消
+        tasks = list(self._poll_tasks) + [task for _, task in self._inflight.values()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
         if self._client:
             await self._client.aclose()
         logger.info("Poller stopped")
     
     def _load_servers(self):
         """从配置文件加载服务器列表"""
+        servers = self._read_config()
+        if servers is None:
+            return
+        for server in servers.values():
+            self._servers[server.id] = server
+            self._states[server.id] = ServerRecord(server.id)
+            self._index.update(server, self._states[server.id])
+            self._stats.update(server.id, self._states[server.id])
+            self._channel_index.update(server.id, self._states[server.id])
+        self._index.set_order(self._servers)
+        self._rebuild_endpoints()
+        logger.info(f"Loaded {len(self._servers)} servers from config")
+    
+    def _rebuild_endpoints(self):
+        """按 base_url 分组服务器（配置变化后调用）"""
+        endpoints: dict[str, list[str]] = {}
+        for sid, server in self._servers.items():
+            endpoints.setdefault(server.base_url, []).append(sid)
+        self._endpoints = endpoints
+    
+    def _config_stamp(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(settings.servers_config_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _read_config(self) -> Optional[dict[str, ServerConfig]]:
+        """解析配置文件；文件不存在或内容无效时返回 None"""
         config_path = Path(settings.servers_config_path)
+        self._config_stamp_seen = self._config_stamp()
         if not config_path.exists():
             logger.warning(f"Config file not found: {config_path}")
+            return None
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            servers = [ServerConfig(**item) for item in data.get("servers", [])]
+        except (ValueError, TypeError) as e:
+            logger.error(f"Invalid config file {config_path}: {e}")
+            return None
+        return {server.id: server for server in servers}
+    
+    @property
+    def federated(self) -> bool:
+        """是否为聚合实例（不直接轮询 IPVTL）"""
+        return settings.federation_config_path is not None
+    
+    @property
+    def is_polling_process(self) -> bool:
+        """本进程是否负责轮询（单进程模式或多进程中的主进程）"""
+        if self.federated:
+            return False
+        return not shared_state_service.enabled or shared_state_service.is_leader
+    
+    def _restore_state_snapshot(self):
+        """加载上次保存的状态，标记为过期；地址已变化的服务器不使用旧状态"""
+        loaded = state_store_service.load()
+        if loaded is None:
             return
-        with open(config_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        for item in data.get("servers", []):
-            server = ServerConfig(**item)
-            self._servers[server.id] = server
-            self._states[server.id] = ServerState(server_id=server.id)
-        logger.info(f"Loaded {len(self._servers)} servers from config")
+        body, saved_at = loaded
+        try:
+            responses = _server_list_adapter.validate_json(body)
+        except ValueError as e:
+            logger.warning(f"Invalid state snapshot: {e}")
+            return
+        restored = 0
+        for r in responses:
+            server = self._servers.get(r.config.id)
+            if server is None or server.base_url != r.config.base_url:
+                continue
+            state = ServerRecord.from_model(r.state)
+            state.stale = True
+            state.circuit = CircuitState.CLOSED
+            self._states[server.id] = state
+            self._index.update(server, state)
+            self._stats.update(server.id, state)
+            self._channel_index.update(server.id, state)
+            restored += 1
+        if restored:
+            version = self._next_version()
+            for sid in self._servers:
+                self._server_versions[sid] = version
+        age = (datetime.now() - saved_at).total_seconds()
+        logger.info(f"Restored {restored} server states from snapshot saved {age:.0f}s ago")
     
-    def reload_servers(self):
-        """重新加载服务器配置"""
-        old_ids = set(self._servers.keys())
-        self._servers.clear()
-        self._load_servers()
-        # 清理已删除服务器的状态
-        for sid in old_ids - set(self._servers.keys()):
-            self._states.pop(sid, None)
+    async def _persist_loop(self):
+        """定期保存状态快照（仅在状态有变化时写入）"""
+        saved: Optional[int] = None
+        while True:
+            await asyncio.sleep(settings.state_snapshot_interval)
+            if not self.is_polling_process or self._version == saved:
+                continue
+            try:
+                cached = self.snapshot_json()
+                await asyncio.to_thread(state_store_service.save, cached.body)
+                saved = cached.version
+            except Exception as e:
+                logger.error(f"Failed to save state snapshot: {e}")
+    
+    def reload_servers(self, servers: Optional[dict[str, ServerConfig]] = None) -> dict[str, list[str]]:
+        """
+        增量重新加载服务器配置，返回 added/removed/updated 的服务器ID
+        - 未变化的服务器：状态与进行中的轮询不受影响
+        - 仅名称/描述变化：替换配置，保留状态
+        - 地址变化：视为新服务器，重置状态并尽快轮询（旧地址的进行中结果会被丢弃）
+        """
+        if servers is None:
+            servers = self._read_config()
+        changes = {"added": [], "removed": [], "updated": []}
+        if servers is None:
+            return changes
+        for sid in self._servers.keys() - servers.keys():
+            self._forget_server(sid)
+            changes["removed"].append(sid)
+        rekeyed = []
+        for sid, server in servers.items():
+            old = self._servers.get(sid)
+            if old is None:
+                self._states[sid] = ServerRecord(sid)
+                changes["added"].append(sid)
+            elif old.base_url != server.base_url:
+                self._forget_server(sid)
+                self._states[sid] = ServerRecord(sid)
+                rekeyed.append(sid)
+                changes["updated"].append(sid)
+            elif old != server:
+                changes["updated"].append(sid)
+            else:
+                servers[sid] = old
+        # 整体替换，保持配置文件中的顺序
+        self._servers = servers
+        if not any(changes.values()):
+            return changes
+        old_endpoints = self._endpoints
+        self._rebuild_endpoints()
+        for endpoint in old_endpoints.keys() - self._endpoints.keys():
+            self._next_due.pop(endpoint, None)
+            self._failures.pop(endpoint, None)
+            breaker_service.remove(endpoint)
+        # 地址变化的服务器尽快轮询，新增服务器随机分布在下一个周期内
+        now = time.monotonic()
+        for sids, window in ((changes["added"], settings.poll_interval),
+                             (rekeyed, settings.poll_fast_interval)):
+            for sid in sids:
+                endpoint = servers[sid].base_url
+                due = now + random.uniform(0, window)
+                if endpoint not in self._next_due:
+                    self._schedule_at(endpoint, due)
+                else:
+                    self._reschedule_if_sooner(endpoint, due - now)
+        self._index.set_order(servers)
+        version = self._next_version()
+        for sid in changes["added"] + changes["updated"]:
+            self._server_versions[sid] = version
+            self._index.update(servers[sid], self._states[sid])
+            self._stats.update(sid, self._states[sid])
+            self._channel_index.update(sid, self._states[sid])
+        logger.info(
+            f"Config reloaded: {len(changes['added'])} added, "
+            f"{len(changes['removed'])} removed, {len(changes['updated'])} updated"
+        )
+        # 服务器列表变化，推送完整快照
+        stream_service.publish_raw("snapshot", self.snapshot_json().body.decode())
+        return changes
+    
+    def _forget_server(self, server_id: str):
+        """清理服务器的运行状态；其进行中的轮询结果将被丢弃"""
+        self._states.pop(server_id, None)
+        self._polled_at.pop(server_id, None)
+        alert_service.forget(server_id)
+        self._server_versions.pop(server_id, None)
+        self._index.remove(server_id)
+        self._stats.remove(server_id)
+        self._channel_index.remove(server_id)
+        snapshot_cache.discard(f"server:{server_id}")
+        history_service.remove(server_id)
+    
+    async def _watch_config_loop(self):
+        """监视配置文件变化并自动增量重新加载（仅轮询进程）"""
+        while True:
+            await asyncio.sleep(settings.servers_watch_interval)
+            if not self.is_polling_process:
+                continue
+            try:
+                if self._config_stamp() == self._config_stamp_seen:
+                    continue
+                servers = await asyncio.to_thread(self._read_config)
+                if servers is not None:
+                    self.reload_servers(servers)
+            except Exception as e:
+                logger.error(f"Config watch error: {e}")
+    
+    @property
+    def version(self) -> int:
+        return self._version
+    
+    def _next_version(self) -> int:
+        """递增版本号：取微秒时间戳，保证单调且多个进程之间不会产生相同版本"""
+        self._version = max(self._version + 1, time.time_ns() // 1000)
+        return self._version
     
-    def get_all_servers(self) -> list[tuple[ServerConfig, ServerState]]:
+    def snapshot_json(self) -> CachedBody:
+        """所有服务器的已编码 JSON（按状态版本缓存）"""
+        return snapshot_cache.get(
+            "servers", self._version,
+            lambda: _encode_json([
+                {"config": config.model_dump(mode="json"), "state": state.to_json()}
+                for config, state in self.get_all_servers()
+            ])
+        )
+    
+    def server_json(self, server_id: str) -> Optional[CachedBody]:
+        """单个服务器的已编码 JSON（按该服务器的状态版本缓存）"""
+        result = self.get_server(server_id)
+        if not result:
+            return None
+        config, state = result
+        return snapshot_cache.get(
+            f"server:{server_id}", self._server_versions.get(server_id, 0),
+            lambda: _encode_json({"config": config.model_dump(mode="json"), "state": state.to_json()})
+        )
+    
+    def stats_json(self, top: int) -> CachedBody:
+        """全集群统计的已编码 JSON（按状态版本缓存）"""
+        def build() -> bytes:
+            summary = self._stats.summary(top)
+            for server in summary["hottest"]:
+                server["name"] = self._servers[server["server_id"]].name
+            return _encode_json(summary)
+        return snapshot_cache.get(f"stats:{top}", self._version, build)
+    
+    def get_all_servers(self) -> list[tuple[ServerConfig, ServerRecord]]:
         """获取所有服务器及其状态"""
         return [
             (self._servers[sid], self._states[sid])
             for sid in self._servers
         ]
     
-    def get_server(self, server_id: str) -> Optional[tuple[ServerConfig, ServerState]]:
+    def get_server(self, server_id: str) -> Optional[tuple[ServerConfig, ServerRecord]]:
         """获取单个服务器信息"""
         if server_id not in self._servers:
             return None
         return (self._servers[server_id], self._states[server_id])
     
-    async def poll_server(self, server_id: str) -> ServerState:
-        """手动刷新单个服务器状态"""
-        if server_id not in self._servers:
+    def find_channels(
+        self,
+        server_id: Optional[str] = None,
+        state: Optional[ChannelState] = None,
+        fps_lt: Optional[float] = None,
+        fps_gte: Optional[float] = None,
+        bitrate_lt: Optional[int] = None,
+        bitrate_gte: Optional[int] = None,
+        online_only: bool = True
+    ) -> list[tuple[ServerConfig, ChannelRecord]]:
+        """
+        按已解析的通道指标筛选通道（指标缺失的通道不参与数值条件），
+        通过通道索引查询，按配置文件中的服务器顺序、通道编号返回
+        """
+        matches = self._channel_index.select(
+            server_id, state, fps_lt, fps_gte, bitrate_lt, bitrate_gte, online_only
+        )
+        position = self._index.position
+        matches.sort(key=lambda m: (position(m[0][0]), m[0][1]))
+        return [(self._servers[sid], ch) for (sid, _), ch in matches if sid in self._servers]
+    
+    def query_servers(
+        self,
+        statuses: Optional[list[ServerStatus]] = None,
+        groups: Optional[list[str]] = None,
+        channel_state: Optional[ChannelState] = None,
+        cpu_gte: Optional[float] = None,
+        cpu_lt: Optional[float] = None
+    ) -> list[str]:
+        """通过二级索引筛选服务器，按配置文件顺序返回服务器ID"""
+        selected = self._index.select(statuses, groups, channel_state, cpu_gte, cpu_lt)
+        if selected is None:
+            return list(self._servers)
+        return sorted(
+            (sid for sid in selected if sid in self._servers),
+            key=self._index.position
+        )
+    
+    async def poll_server(self, server_id: str, max_age: Optional[float] = None) -> ServerRecord:
+        """
+        手动刷新单个服务器状态
+        max_age: 结果新鲜度要求(秒)，默认 poll_fresh_window；传 0 强制发起新的轮询。
+        足够新的结果直接返回；进行中的轮询在 max_age 内发起时等待其结果，
+        否则在其完成后发起新的轮询（例如通道操作前发出的请求不反映操作结果）
+        """
+        server = self._servers.get(server_id)
+        if server is None:
             raise ValueError(f"Server not found: {server_id}")
-        await self._poll_single(self._servers[server_id])
+        if self.federated:
+            # 聚合模式：状态由站点推送
+            return self._states[server_id]
+        if max_age is None:
+            max_age = settings.poll_fresh_window
+        now = time.monotonic()
+        polled_at = self._polled_at.get(server_id)
+        if polled_at is not None and now - polled_at < max_age:
+            return self._states[server_id]
+        await self._poll_shared(server.base_url, not_before=now - max_age)
+        # 例如通道操作后进入 STOPPING，需要提前下一次轮询
+        self._reschedule_if_sooner(server.base_url)
         return self._states[server_id]
     
+    def _schedule_at(self, endpoint: str, due: float):
+        """设置端点下一次轮询时间"""
+        self._next_due[endpoint] = due
+        heapq.heappush(self._schedule, (due, endpoint))
+        self._wakeup.set()
+    
+    def _schedule_all(self):
+        """将所有端点均匀错峰分布在一个轮询周期内"""
+        self._schedule.clear()
+        self._next_due.clear()
+        now = time.monotonic()
+        count = len(self._endpoints)
+        for i, endpoint in enumerate(self._endpoints):
+            self._schedule_at(endpoint, now + settings.poll_interval * (i + 1) / count)
+    
+    def _reschedule_if_sooner(self, endpoint: str, delay: Optional[float] = None):
+        """下次轮询时间若可以更早（默认按最新状态计算），则提前"""
+        new_due = time.monotonic() + (self._next_delay(endpoint) if delay is None else delay)
+        due = self._next_due.get(endpoint)
+        if due is None:
+            # 正在被调度器轮询：直接排期，调度轮询完成后以此为准（见 _poll_scheduled）
+            if self._poll_task is not None and endpoint in self._endpoints:
+                self._schedule_at(endpoint, new_due)
+            return
+        if new_due < due:
+            self._schedule_at(endpoint, new_due)
+    
+    def _next_delay(self, endpoint: str) -> float:
+        """
+        计算下次轮询间隔
+        - OFFLINE/ERROR: 按连续失败次数指数退避
+        - 有通道处于 STOPPING: 快速轮询
+        - 其他: 常规间隔
+        """
+        # 同一端点的服务器共享同一份 /status 结果
+        state = self._states[self._endpoints[endpoint][0]]
+        if state.status != ServerStatus.ONLINE:
+            failures = min(self._failures.get(endpoint, 1), 16)
+            delay = min(
+                settings.poll_interval * 2 ** (failures - 1),
+                settings.poll_backoff_max
+            )
+        elif any(ch.state == ChannelState.STOPPING for ch in state.channels):
+            delay = settings.poll_fast_interval
+        else:
+            delay = settings.poll_interval
+        # 断路器打开期间的轮询会被跳过，直接排到允许探测之后
+        delay = max(delay, breaker_service.retry_after(endpoint))
+        # 随机抖动，避免各服务器逐渐对齐
+        jitter = settings.poll_jitter
+        return delay * random.uniform(1 - jitter, 1 + jitter)
+    
     async def _poll_loop(self):
-        """轮询主循环"""
+        """调度主循环：按各端点到期时间依次发起轮询"""
         while True:
-            await asyncio.sleep(settings.poll_interval)
+            now = time.monotonic()
+            while self._schedule and self._schedule[0][0] <= now:
+                due, endpoint = heapq.heappop(self._schedule)
+                if self._next_due.get(endpoint) != due:
+                    # 已被重新排期或删除的过期条目
+                    if endpoint not in self._endpoints:
+                        POLL_SKIPPED_TOTAL.inc(reason="removed")
+                    continue
+                del self._next_due[endpoint]
+                lag = now - due
+                POLL_LAG_SECONDS.observe(lag)
+                if lag > _LATE_THRESHOLD:
+                    POLL_LATE_TOTAL.inc()
+                task = asyncio.create_task(self._poll_scheduled(endpoint))
+                self._poll_tasks.add(task)
+                task.add_done_callback(self._poll_tasks.discard)
+            timeout = self._schedule[0][0] - now if self._schedule else None
+            self._wakeup.clear()
             try:
-                await self._poll_all()
-            except Exception as e:
-                logger.error(f"Poll cycle error: {e}")
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _poll_shared(self, endpoint: str, not_before: Optional[float] = None):
+        """
+        发起或加入该端点进行中的轮询
+        not_before: 只加入在该时间 (monotonic) 之后发起的轮询，更早发起的轮询完成后再发起新的轮询
+        """
+        entry = self._inflight.get(endpoint)
+        if entry is not None and (not_before is None or entry[0] >= not_before):
+            task = entry[1]
+        else:
+            previous = entry[1] if entry is not None else None
+            task = asyncio.create_task(self._poll_after(endpoint, previous))
+            self._inflight[endpoint] = (time.monotonic(), task)
+            task.add_done_callback(lambda t: self._clear_inflight(endpoint, t))
+        # shield: 单个等待方被取消时不影响其他等待方
+        await asyncio.shield(task)
+    
+    async def _poll_after(self, endpoint: str, previous: Optional[asyncio.Task]):
+        """等待同一端点之前的轮询完成后再轮询，保证结果按发起顺序应用"""
+        if previous is not None:
+            await asyncio.wait([previous])
+        await self._poll_endpoint(endpoint)
+    
+    def _clear_inflight(self, endpoint: str, task: asyncio.Task):
+        entry = self._inflight.get(endpoint)
+        if entry is not None and entry[1] is task:
+            del self._inflight[endpoint]
+    
+    async def _poll_scheduled(self, endpoint: str):
+        """执行一次调度轮询并排期下一次"""
+        if endpoint not in self._endpoints:
+            return
+        self._scheduled_pending.add(endpoint)
+        try:
+            await self._poll_shared(endpoint)
+        except Exception as e:
+            logger.error(f"Poll {endpoint} error: {e}")
+        finally:
+            self._scheduled_pending.discard(endpoint)
+        # 期间若因配置变化已被重新排期，则以新的排期为准
+        if endpoint in self._endpoints and endpoint not in self._next_due:
+            self._schedule_at(endpoint, time.monotonic() + self._next_delay(endpoint))
     
     async def _poll_all(self):
-        """并发轮询所有服务器"""
+        """并发轮询所有端点（多个服务器共用同一端点时只请求一次）"""
+        started = time.perf_counter()
+        self._scheduled_pending.update(self._endpoints)
         tasks = [
-            self._poll_single(server)
-            for server in self._servers.values()
+            self._poll_shared(endpoint)
+            for endpoint in self._endpoints
         ]
         await asyncio.gather(*tasks, return_exceptions=True)
+        self._scheduled_pending.clear()
+        logger.info(f"Initial poll of {len(tasks)} endpoints took {time.perf_counter() - started:.2f}s")
     
-    async def _poll_single(self, server: ServerConfig):
-        """轮询单个服务器 - 调用 /status 接口"""
-        async with self._semaphore:
-            state = self._states[server.id]
-            try:
-                # 调用 IPVTL /status 接口
-                resp = await self._client.get(f"{server.base_url}/status")
-                resp.raise_for_status()
-                data = resp.json()
-                
-                # 解析 CPU 数据
-                cpu_cores = data.get("cpu", [])
-                cpu_avg = sum(cpu_cores) / len(cpu_cores) if cpu_cores else None
-                
-                # 解析通道数据
-                channels = []
-                for idx, ch in enumerate(data.get("channels", [])):
-                    channel_id = idx + 1  # 1-based ID
+    async def _poll_endpoint(self, endpoint: str):
+        """轮询一个 IPVTL 端点的 /status 接口，结果应用到使用该端点的所有服务器"""
+        with tracing_service.trace("poll", endpoint=endpoint):
+            if not breaker_service.allow(endpoint):
+                # 断路器打开：不占用并发名额，也不等待超时
+                POLL_SKIPPED_TOTAL.inc(reason="circuit_open")
+                tracing_service.annotate(skipped="circuit_open")
+                return
+            # 断路器冷却结束后的探测请求使用较短超时
+            probe = breaker_service.is_probe(endpoint)
+            timeout = settings.breaker_probe_timeout if probe else settings.poll_timeout
+            wait_started = time.perf_counter()
+            async with self._semaphore:
+                POLL_SEMAPHORE_WAIT_SECONDS.observe(time.perf_counter() - wait_started)
+                tracing_service.add_span("semaphore_wait", wait_started)
+                if endpoint not in self._endpoints:
+                    # 等待期间已从配置中删除：请求未发出，归还探测名额
+                    if probe:
+                        breaker_service.release(endpoint)
+                    return
+                status, error_message, result = ServerStatus.ONLINE, None, None
+                try:
+                    # 调用 IPVTL /status 接口
+                    request_started = time.perf_counter()
+                    # 超时与连接错误同样记录耗时：用于评估 poll_timeout
+                    outcome = None
                     try:
-                        ch_state = ChannelState(ch.get("state", "idle"))
-                    except ValueError:
-                        ch_state = ChannelState.IDLE
-                    channels.append(ChannelInfo(
-                        id=channel_id,
-                        state=ch_state,
-                        status=ch.get("status", "")
-                    ))
+                        resp = await self._client.get(
+                            f"{endpoint}/status", timeout=timeout,
+                            extensions=tracing_service.httpx_trace()
+                        )
+                        outcome = "ok" if resp.is_success else "http_error"
+                    except httpx.TransportError as e:
+                        outcome = "timeout" if isinstance(e, httpx.TimeoutException) else "transport_error"
+                        breaker_service.record_failure(endpoint)
+                        tracing_service.add_span("request", request_started, error=type(e).__name__)
+                        raise
+                    finally:
+                        if outcome is not None:
+                            POLL_REQUEST_SECONDS.observe(
+                                time.perf_counter() - request_started, endpoint=endpoint, outcome=outcome
+                            )
+                    tracing_service.add_span("request", request_started, status_code=resp.status_code)
+                    breaker_service.record_success(endpoint)
+                    resp.raise_for_status()
+                    parse_started = time.perf_counter()
+                    data = resp.json()
+                    POLL_JSON_PARSE_SECONDS.observe(time.perf_counter() - parse_started)
+                    tracing_service.add_span("json_parse", parse_started)
                 
-                # 更新状态
-                state.status = ServerStatus.ONLINE
-                state.cpu_cores = cpu_cores
-                state.cpu_avg = cpu_avg
-                state.channels = channels
-                state.error_message = None
-                state.last_poll_time = datetime.now()
+                    # 解析 CPU 数据
+                    cpu_cores = data.get("cpu", [])
+                    cpu_avg = sum(cpu_cores) / len(cpu_cores) if cpu_cores else None
+                    raw_channels = [
+                        (ch.get("state", "idle"), ch.get("status", ""))
+                        for ch in data.get("channels", [])
+                    ]
+                    result = (cpu_cores, cpu_avg, raw_channels)
+                    POLL_TOTAL.inc(outcome="ok")
+                    logger.debug(
+                        f"Polled {endpoint}: {len(result[2])} channels, CPU avg {cpu_avg or 0:.1f}%"
+                    )
                 
-                logger.debug(f"Polled {server.name}: {len(channels)} channels, CPU avg {cpu_avg:.1f}%")
-                
-            except httpx.HTTPStatusError as e:
-                state.status = ServerStatus.ERROR
-                state.error_message = f"HTTP {e.response.status_code}"
-                state.last_poll_time = datetime.now()
-                logger.warning(f"Poll {server.name} HTTP error: {e}")
-            except httpx.ConnectError:
-                state.status = ServerStatus.OFFLINE
-                state.error_message = "Connection refused"
-                state.last_poll_time = datetime.now()
-                logger.warning(f"Poll {server.name}: connection refused")
+                except httpx.HTTPStatusError as e:
+                    status, error_message = ServerStatus.ERROR, f"HTTP {e.response.status_code}"
+                    POLL_TOTAL.inc(outcome="http_error")
+                    logger.warning(f"Poll {endpoint} HTTP error: {e}")
+                except httpx.ConnectError:
+                    status, error_message = ServerStatus.OFFLINE, "Connection refused"
+                    POLL_TOTAL.inc(outcome="connect_error")
+                    logger.warning(f"Poll {endpoint}: connection refused")
+                except Exception as e:
+                    status, error_message = ServerStatus.OFFLINE, str(e)
+                    POLL_TOTAL.inc(outcome="error")
+                    logger.warning(f"Poll {endpoint} failed: {e}")
+            
+                server_ids = self._endpoints.get(endpoint)
+                if not server_ids:
+                    # 请求期间端点已从配置中删除，丢弃结果
+                    POLL_SKIPPED_TOTAL.inc(reason="config_changed")
+                    return
+                if status == ServerStatus.ONLINE:
+                    self._failures.pop(endpoint, None)
+                else:
+                    self._failures[endpoint] = self._failures.get(endpoint, 0) + 1
+                tracing_service.annotate(status=status.value, error=error_message)
+                scheduled = endpoint in self._scheduled_pending
+                self._scheduled_pending.discard(endpoint)
+                # 只应用到当前使用该端点的服务器：请求期间地址已变化的服务器不在其中
+                with tracing_service.span("apply", servers=len(server_ids)):
+                    for sid in server_ids:
+                        self._apply_result(self._servers[sid], status, error_message, result, scheduled)
+    
+    def _on_circuit_change(self, endpoint: str, circuit: CircuitState):
+        """断路器状态变化时同步到使用该端点的服务器状态"""
+        for sid in self._endpoints.get(endpoint, ()):
+            state = self._states[sid]
+            if state.circuit is circuit:
+                continue
+            state.circuit = circuit
+            self._publish_changes(state, PollChanges({"circuit": circuit.value}, [], False))
+            self._server_versions[sid] = self._next_version()
+    
+    def _apply_result(
+        self, server: ServerConfig, status: ServerStatus, error_message: Optional[str],
+        result: Optional[tuple[list[int], Optional[float], list[tuple[str, str]]]],
+        scheduled: bool = False
+    ):
+        """
+        写入一次轮询结果；有变化时推送增量并更新版本与索引
+        scheduled: 是否为调度轮询（计入告警的连续轮询次数）
+        """
+        state = self._states[server.id]
+        polled_before = state.last_poll_time is not None
+        old_status = state.status
+        changes = state.apply_poll(status, error_message, result, datetime.now())
+        self._polled_at[server.id] = time.monotonic()
+        history_service.record(state)
+        if changes is not None:
+            self._publish_changes(state, changes)
+            self._server_versions[server.id] = self._next_version()
+            self._index.update(server, state)
+            self._stats.update(server.id, state)
+            self._channel_index.update(
+                server.id, state, None if changes.replaced else [ch for ch, _, _ in changes.channels]
+            )
+        if not self.is_polling_process:
+            # 多进程部署中非主进程的手动刷新只更新本进程状态：事件、告警与看门狗只在主进程中处理
+            return
+        if changes is not None:
+            journal_service.record_poll(state, polled_before, old_status, changes)
+        alert_service.evaluate(server, state, count_poll=scheduled)
+        if self._poll_listener is not None:
+            self._poll_listener(server, state)
+    
+    @staticmethod
+    def _publish_changes(state: ServerRecord, changes: PollChanges):
+        """推送变化的字段和通道（通道数量变化时 changes.fields 中包含完整通道列表）"""
+        fields = dict(changes.fields)
+        delta = {"server_id": state.server_id, "changes": fields}
+        if not changes.replaced:
+            delta["channels"] = [ch.to_json() for ch, _, _ in changes.channels]
+        if state.last_poll_time:
+            fields["last_poll_time"] = state.last_poll_time.isoformat()
+        stream_service.publish("delta", delta)
+    
+    @staticmethod
+    def _dump_state(state: ServerRecord) -> dict:
+        """用于变更比较的状态字典（不含轮询时间）"""
+        data = state.to_json()
+        del data["last_poll_time"]
+        return data
+    
+    def _publish_delta(self, state: ServerRecord, before: dict) -> bool:
+        """与之前的状态字典比较，仅推送发生变化的字段和通道；返回是否有变化（用于应用共享快照）"""
+        after = self._dump_state(state)
+        if after == before:
+            return False
+        changes = {
+            key: value for key, value in after.items()
+            if key != "channels" and value != before.get(key)
+        }
+        old_channels = before["channels"]
+        new_channels = after["channels"]
+        delta = {"server_id": state.server_id, "changes": changes}
+        if len(old_channels) != len(new_channels):
+            # 通道数量变化时整体替换
+            changes["channels"] = new_channels
+        else:
+            delta["channels"] = [
+                new for old, new in zip(old_channels, new_channels)
+                if old != new
+            ]
+        if state.last_poll_time:
+            changes["last_poll_time"] = state.last_poll_time.isoformat()
+        stream_service.publish("delta", delta)
+        return True
+    
+    async def _shared_state_loop(self):
+        """多进程部署：主进程发布快照；其他进程读取快照，并在主进程退出后接管轮询"""
+        published: Optional[int] = None
+        while True:
+            try:
+                if shared_state_service.is_leader:
+                    if self._version != published:
+                        snapshot = SharedSnapshot(
+                            self._version, dict(self._server_versions),
+                            self.snapshot_json().body
+                        )
+                        await asyncio.to_thread(shared_state_service.publish, snapshot)
+                        published = snapshot.version
+                elif shared_state_service.try_acquire():
+                    logger.info("Poller leader gone, taking over polling")
+                    self._start_polling()
+                    continue
+                else:
+                    snapshot = await asyncio.to_thread(shared_state_service.read_if_changed)
+                    if snapshot:
+                        self._apply_shared_snapshot(snapshot)
             except Exception as e:
-                state.status = ServerStatus.OFFLINE
-                state.error_message = str(e)
-                state.last_poll_time = datetime.now()
-                logger.warning(f"Poll {server.name} failed: {e}")
+                logger.error(f"Shared state sync error: {e}")
+            await asyncio.sleep(settings.shared_state_sync_interval)
+    
+    def _apply_shared_snapshot(self, snapshot: SharedSnapshot):
+        """应用主进程快照；本进程刚手动刷新过、比快照更新的服务器保留本地结果"""
+        responses = _server_list_adapter.validate_json(snapshot.body)
+        servers = {r.config.id: r.config for r in responses}
+        structure_changed, kept_local = self._merge_states(servers, responses)
+        versions = dict(snapshot.server_versions)
+        if kept_local:
+            # 保留本地结果的服务器沿用本地版本；整体内容与主进程快照不同，需使用新的版本号
+            for sid in kept_local:
+                versions[sid] = self._server_versions.get(sid, versions.get(sid, 0))
+            self._version = max(self._version, snapshot.version)
+            self._next_version()
+        else:
+            self._version = snapshot.version
+        self._server_versions = versions
+        if structure_changed:
+            stream_service.publish_raw("snapshot", self.snapshot_json().body.decode())
+    
+    def apply_site_snapshot(self, servers: dict[str, ServerConfig], responses: list[ServerResponse]):
+        """
+        聚合模式：合并一个站点的完整快照
+        servers 为合并后全部站点的服务器（按站点顺序），responses 为该站点的服务器及状态
+        """
+        removed = self._servers.keys() - servers.keys()
+        structure_changed, _ = self._merge_states(servers, responses)
+        for sid in removed:
+            self._forget_server(sid)
+        version = self._next_version()
+        for r in responses:
+            self._server_versions[r.config.id] = version
+        if structure_changed:
+            stream_service.publish_raw("snapshot", self.snapshot_json().body.decode())
+    
+    def apply_site_delta(self, delta: dict):
+        """聚合模式：应用站点推送的增量（server_id 已加站点前缀），并原样转发给本实例的订阅者"""
+        sid = delta["server_id"]
+        state = self._states.get(sid)
+        if state is None:
+            # 尚未收到该服务器所在站点的快照
+            return
+        state.apply_delta(delta["changes"], delta.get("channels", []))
+        history_service.record(state)
+        self._server_versions[sid] = self._next_version()
+        self._index.update(self._servers[sid], state)
+        self._stats.update(sid, state)
+        self._channel_index.update(sid, state)
+        stream_service.publish("delta", delta)
+    
+    def _merge_states(
+        self, servers: dict[str, ServerConfig], responses: list[ServerResponse]
+    ) -> tuple[bool, set[str]]:
+        """
+        用其他来源（多进程主进程快照、聚合模式的站点快照）的状态替换本地状态；
+        比 responses 更新的本地状态保留。返回 (服务器列表是否变化, 保留本地状态的服务器)
+        """
+        structure_changed = list(self._servers) != list(servers)
+        kept_local: set[str] = set()
+        for r in responses:
+            sid = r.config.id
+            old = self._states.get(sid)
+            if (old is not None and old.last_poll_time and r.state.last_poll_time
+                    and r.state.last_poll_time < old.last_poll_time):
+                kept_local.add(sid)
+                continue
+            state = ServerRecord.from_model(r.state)
+            self._states[sid] = state
+            self._stats.update(sid, state)
+            self._channel_index.update(sid, state)
+            if old is not None and not structure_changed:
+                self._publish_delta(state, self._dump_state(old))
+        self._servers = servers
+        for sid in list(self._states):
+            if sid not in servers:
+                del self._states[sid]
+                self._index.remove(sid)
+                self._stats.remove(sid)
+                self._channel_index.remove(sid)
+        for sid, config in servers.items():
+            self._index.update(config, self._states[sid])
+        self._rebuild_endpoints()
+        if structure_changed:
+            self._index.set_order(servers)
+        return structure_changed, kept_local
 
 # 全局单例
 poller_service = PollerService()
@@ -0,0 +1,93 @@
+"""采样分析：按需对运行中的事件循环线程采样调用栈"""
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from app.config import settings
+from app.models import ProfileFunction, ProfileResult, ProfileStack
+
+_TOP = 50
+
+class ProfilerService:
+    """
+    在后台线程中按 profiler_interval 读取事件循环线程的当前调用栈（sys._current_frames），
+    不在事件循环中插入任何钩子，分析期间只增加采样线程的开销；同一时间只运行一次分析。
+    事件循环空闲时的采样落在事件循环自身（selector 的 select，或 uvloop 下的 asyncio.run）上
+    """
+
+    def __init__(self):
+        self._running = False
+
+    @property
+    def enabled(self) -> bool:
+        return settings.profiler_enabled
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def profile(self, seconds: float) -> ProfileResult:
+        """采样 seconds 秒（不超过 profiler_max_seconds）并汇总结果；调用前需检查 running"""
+        seconds = min(seconds, settings.profiler_max_seconds)
+        self._running = True
+        try:
+            thread_id = threading.get_ident()
+            started = time.perf_counter()
+            samples, stacks = await asyncio.to_thread(
+                self._sample, thread_id, seconds, settings.profiler_interval
+            )
+            duration = time.perf_counter() - started
+        finally:
+            self._running = False
+        return self._summarize(samples, stacks, duration)
+
+    @staticmethod
+    def _sample(thread_id: int, seconds: float, interval: float) -> tuple[int, Counter]:
+        """采样线程：统计各调用栈（由外到内的 "文件:行号 函数" 元组）出现的次数"""
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename}:{code.co_firstlineno} {code.co_name}")
+                    frame = frame.f_back
+                stack.reverse()
+                stacks[tuple(stack)] += 1
+                samples += 1
+            # 释放 GIL，让事件循环线程继续运行
+            time.sleep(interval)
+        return samples, stacks
+
+    @staticmethod
+    def _summarize(samples: int, stacks: Counter, duration: float) -> ProfileResult:
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in stacks.items():
+            self_counts[stack[-1]] += count
+            # 递归函数在同一调用栈中只计一次
+            for function in set(stack):
+                total_counts[function] += count
+        functions = [
+            ProfileFunction(
+                function=function, self_samples=self_counts[function], total_samples=count,
+                total_percent=round(count * 100 / samples, 1)
+            )
+            for function, count in sorted(
+                total_counts.items(), key=lambda item: (-self_counts[item[0]], -item[1])
+            )[:_TOP]
+        ]
+        return ProfileResult(
+            duration_seconds=round(duration, 3), samples=samples, functions=functions,
+            stacks=[
+                ProfileStack(stack=";".join(stack), samples=count)
+                for stack, count in stacks.most_common(_TOP)
+            ]
+        )
+
+# 全局单例
+profiler_service = ProfilerService()
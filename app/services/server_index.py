@@ -0,0 +1,95 @@
+"""服务器二级索引：按状态/分组/通道状态/CPU 筛选时无需遍历全部服务器"""
+import bisect
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional
+from app.models import ChannelState, ServerConfig, ServerStatus
+from app.services.state_records import ServerRecord
+
+class _Entry(NamedTuple):
+    """服务器当前所在的索引位置"""
+    status: ServerStatus
+    group: Optional[str]
+    channel_states: frozenset[ChannelState]
+    cpu_avg: Optional[float]
+
+class ServerIndex:
+    """随状态变化增量维护的二级索引（只在服务器状态或配置变化时更新）"""
+
+    def __init__(self):
+        self._entries: dict[str, _Entry] = {}
+        self._by_status: defaultdict[ServerStatus, set[str]] = defaultdict(set)
+        self._by_group: defaultdict[Optional[str], set[str]] = defaultdict(set)
+        self._by_channel_state: defaultdict[ChannelState, set[str]] = defaultdict(set)
+        self._by_cpu: list[tuple[float, str]] = []  # 按 CPU 升序，无 CPU 数据的服务器不在其中
+        self._order: dict[str, int] = {}  # 配置文件中的顺序
+
+    def set_order(self, server_ids: Iterable[str]):
+        """更新服务器的默认排序（配置变化后调用）"""
+        self._order = {sid: i for i, sid in enumerate(server_ids)}
+
+    def position(self, server_id: str) -> int:
+        return self._order.get(server_id, len(self._order))
+
+    def update(self, config: ServerConfig, state: ServerRecord):
+        """按最新状态更新服务器的索引位置"""
+        entry = _Entry(
+            state.status, config.description,
+            frozenset(ch.state for ch in state.channels), state.cpu_avg
+        )
+        old = self._entries.get(config.id)
+        if old == entry:
+            return
+        if old is not None:
+            self._unindex(config.id, old)
+        self._entries[config.id] = entry
+        self._by_status[entry.status].add(config.id)
+        self._by_group[entry.group].add(config.id)
+        for channel_state in entry.channel_states:
+            self._by_channel_state[channel_state].add(config.id)
+        if entry.cpu_avg is not None:
+            bisect.insort(self._by_cpu, (entry.cpu_avg, config.id))
+
+    def remove(self, server_id: str):
+        """删除服务器"""
+        old = self._entries.pop(server_id, None)
+        if old is not None:
+            self._unindex(server_id, old)
+
+    def _unindex(self, server_id: str, entry: _Entry):
+        self._by_status[entry.status].discard(server_id)
+        self._by_group[entry.group].discard(server_id)
+        for channel_state in entry.channel_states:
+            self._by_channel_state[channel_state].discard(server_id)
+        if entry.cpu_avg is not None:
+            i = bisect.bisect_left(self._by_cpu, (entry.cpu_avg, server_id))
+            if i < len(self._by_cpu) and self._by_cpu[i] == (entry.cpu_avg, server_id):
+                del self._by_cpu[i]
+
+    def select(
+        self,
+        statuses: Optional[list[ServerStatus]] = None,
+        groups: Optional[list[str]] = None,
+        channel_state: Optional[ChannelState] = None,
+        cpu_gte: Optional[float] = None,
+        cpu_lt: Optional[float] = None
+    ) -> Optional[set[str]]:
+        """返回满足所有条件的服务器ID；没有任何条件时返回 None"""
+        candidates: list[set[str]] = []
+        if statuses:
+            candidates.append(set().union(*(self._by_status.get(s, ()) for s in statuses)))
+        if groups:
+            candidates.append(set().union(*(self._by_group.get(g, ()) for g in groups)))
+        if channel_state is not None:
+            candidates.append(self._by_channel_state.get(channel_state, set()))
+        if cpu_gte is not None or cpu_lt is not None:
+            lo = 0 if cpu_gte is None else bisect.bisect_left(self._by_cpu, (cpu_gte,))
+            hi = len(self._by_cpu) if cpu_lt is None else bisect.bisect_left(self._by_cpu, (cpu_lt,))
+            candidates.append({sid for _, sid in self._by_cpu[lo:hi]})
+        if not candidates:
+            return None
+        # 从最小的集合开始求交集
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for other in candidates[1:]:
+            result &= other
+        return result
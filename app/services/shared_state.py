@@ -0,0 +1,96 @@
+"""多进程部署：轮询主进程选举与状态快照共享"""
+import fcntl
+import json
+import logging
+import os
+from pathlib import Path
+from typing import NamedTuple, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SharedSnapshot(NamedTuple):
+    """主进程发布的状态快照"""
+    version: int
+    server_versions: dict[str, int]
+    body: bytes  # GET /api/servers 的 JSON
+
+class SharedStateService:
+    """
+    同一主机上的多个 worker 通过文件锁选出唯一的轮询主进程；
+    主进程把快照原子写入共享文件（建议放在 /dev/shm 等内存文件系统），
+    其他 worker 只读取快照对外提供查询。主进程退出后锁自动释放，由其他 worker 接管
+    """
+
+    def __init__(self):
+        self._lock_fd: Optional[int] = None
+        self._read_stamp: Optional[tuple[int, int]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.shared_state_path is not None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_fd is not None
+
+    @property
+    def _path(self) -> Path:
+        return Path(settings.shared_state_path)
+
+    def try_acquire(self) -> bool:
+        """尝试成为主进程（非阻塞）"""
+        if self._lock_fd is not None:
+            return True
+        lock_path = self._path.with_name(self._path.name + ".lock")
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        logger.info(f"Worker {os.getpid()} elected as poller leader")
+        return True
+
+    def release(self):
+        """释放主进程锁"""
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def publish(self, snapshot: SharedSnapshot):
+        """原子写入快照：首行为 JSON 头，其后为响应体"""
+        header = json.dumps({
+            "version": snapshot.version,
+            "server_versions": snapshot.server_versions,
+            "pid": os.getpid(),
+        }).encode()
+        tmp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(header + b"\n" + snapshot.body)
+        os.replace(tmp_path, self._path)
+
+    def read_if_changed(self) -> Optional[SharedSnapshot]:
+        """读取主进程快照，文件未变化时返回 None"""
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._read_stamp:
+            return None
+        with open(self._path, "rb") as f:
+            data = f.read()
+        header, _, body = data.partition(b"\n")
+        try:
+            meta = json.loads(header)
+        except ValueError:
+            logger.warning(f"Invalid shared state snapshot: {self._path}")
+            return None
+        self._read_stamp = stamp
+        return SharedSnapshot(meta["version"], meta["server_versions"], body)
+
+# 全局单例
+shared_state_service = SharedStateService()
@@ -0,0 +1,42 @@
+"""按版本缓存的已编码响应"""
+import gzip
+from typing import Callable, Optional
+
+class CachedBody:
+    """一份已编码的 JSON 及其 gzip 版本（首次需要时压缩）"""
+    __slots__ = ("version", "body", "_gzipped")
+
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self._gzipped: Optional[bytes] = None
+
+    @property
+    def etag(self) -> str:
+        # 弱 ETag：原始与 gzip 表示语义相同
+        return f'W/"{self.version}"'
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+class SnapshotCache:
+    """状态版本未变化时直接复用已编码结果，避免重复校验和序列化"""
+
+    def __init__(self):
+        self._entries: dict[str, CachedBody] = {}
+
+    def get(self, key: str, version: int, build: Callable[[], bytes]) -> CachedBody:
+        entry = self._entries.get(key)
+        if entry is None or entry.version != version:
+            entry = CachedBody(version, build())
+            self._entries[key] = entry
+        return entry
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+# 全局单例
+snapshot_cache = SnapshotCache()
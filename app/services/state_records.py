@@ -0,0 +1,177 @@
+"""服务器运行状态的内部表示：轮询结果原地更新，只在 API 边界转换为 pydantic 模型"""
+from datetime import datetime
+from typing import NamedTuple, Optional
+from app.models import ChannelInfo, ChannelState, CircuitState, ServerState, ServerStatus
+from app.services.status_parser import parse_channel_status
+
+# 未知状态字符串按空闲处理
+_CHANNEL_STATES = {state.value: state for state in ChannelState}
+
+class ChannelRecord:
+    """通道状态（字段与 ChannelInfo 相同）"""
+    __slots__ = ("id", "state", "status", "uptime_seconds", "fps", "bitrate_kbps")
+
+    def __init__(self, channel_id: int, state: ChannelState, status: str):
+        self.id = channel_id
+        self.state = state
+        self.status = status
+        self.uptime_seconds, self.fps, self.bitrate_kbps = parse_channel_status(status)
+
+    @classmethod
+    def from_model(cls, channel: ChannelInfo) -> "ChannelRecord":
+        record = cls.__new__(cls)
+        record.id = channel.id
+        record.state = channel.state
+        record.status = channel.status
+        record.uptime_seconds = channel.uptime_seconds
+        record.fps = channel.fps
+        record.bitrate_kbps = channel.bitrate_kbps
+        return record
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ChannelRecord":
+        """由增量推送中的通道 JSON 构造"""
+        record = cls.__new__(cls)
+        record.id = data["id"]
+        record.state = _CHANNEL_STATES.get(data["state"], ChannelState.IDLE)
+        record.status = data["status"]
+        record.uptime_seconds = data["uptime_seconds"]
+        record.fps = data["fps"]
+        record.bitrate_kbps = data["bitrate_kbps"]
+        return record
+
+    def to_model(self) -> ChannelInfo:
+        return ChannelInfo.model_construct(
+            id=self.id, state=self.state, status=self.status,
+            uptime_seconds=self.uptime_seconds, fps=self.fps, bitrate_kbps=self.bitrate_kbps
+        )
+
+    def to_json(self) -> dict:
+        """增量推送中的通道 JSON（与 ChannelInfo 序列化结果一致）"""
+        return {
+            "id": self.id, "state": self.state.value, "status": self.status,
+            "uptime_seconds": self.uptime_seconds, "fps": self.fps,
+            "bitrate_kbps": self.bitrate_kbps, "name": f"Channel {self.id}",
+        }
+
+class PollChanges(NamedTuple):
+    """一次轮询带来的变化"""
+    fields: dict  # 变化的服务器字段 -> 新值 (JSON)
+    channels: list[tuple[ChannelRecord, ChannelState, Optional[float]]]  # (通道, 原状态, 原帧率)
+    replaced: bool  # 通道数量变化，通道列表整体替换
+
+class ServerRecord:
+    """服务器运行状态（字段与 ServerState 相同）"""
+    __slots__ = ("server_id", "status", "cpu_cores", "cpu_avg", "channels",
+                 "last_poll_time", "error_message", "stale", "circuit")
+
+    def __init__(self, server_id: str):
+        self.server_id = server_id
+        self.status = ServerStatus.OFFLINE
+        self.cpu_cores: list[int] = []
+        self.cpu_avg: Optional[float] = None
+        self.channels: list[ChannelRecord] = []
+        self.last_poll_time: Optional[datetime] = None
+        self.error_message: Optional[str] = None
+        self.stale = False
+        self.circuit = CircuitState.CLOSED
+
+    @classmethod
+    def from_model(cls, state: ServerState) -> "ServerRecord":
+        record = cls(state.server_id)
+        record.status = state.status
+        record.cpu_cores = state.cpu_cores
+        record.cpu_avg = state.cpu_avg
+        record.channels = [ChannelRecord.from_model(ch) for ch in state.channels]
+        record.last_poll_time = state.last_poll_time
+        record.error_message = state.error_message
+        record.stale = state.stale
+        record.circuit = state.circuit
+        return record
+
+    def to_model(self) -> ServerState:
+        """转换为 API 模型（字段值已校验，不再重复校验）"""
+        return ServerState.model_construct(
+            server_id=self.server_id, status=self.status, cpu_cores=self.cpu_cores,
+            cpu_avg=self.cpu_avg, channels=[ch.to_model() for ch in self.channels],
+            last_poll_time=self.last_poll_time, error_message=self.error_message,
+            stale=self.stale, circuit=self.circuit
+        )
+
+    def to_json(self) -> dict:
+        """JSON 字典（与 ServerState 序列化结果一致），用于批量编码快照"""
+        return {
+            "server_id": self.server_id, "status": self.status.value,
+            "cpu_cores": self.cpu_cores, "cpu_avg": self.cpu_avg,
+            "channels": [ch.to_json() for ch in self.channels],
+            "last_poll_time": self.last_poll_time.isoformat() if self.last_poll_time else None,
+            "error_message": self.error_message, "stale": self.stale,
+            "circuit": self.circuit.value,
+        }
+
+    def apply_delta(self, changes: dict, channels: list[dict]):
+        """应用增量推送（SSE delta 消息，见 PollerService._publish_changes）"""
+        for key, value in changes.items():
+            if key == "channels":
+                self.channels = [ChannelRecord.from_json(ch) for ch in value]
+            elif key == "status":
+                self.status = ServerStatus(value)
+            elif key == "circuit":
+                self.circuit = CircuitState(value)
+            elif key == "last_poll_time":
+                self.last_poll_time = datetime.fromisoformat(value) if value else None
+            elif key in ("cpu_cores", "cpu_avg", "error_message", "stale"):
+                setattr(self, key, value)
+        for data in channels:
+            index = data["id"] - 1
+            if 0 <= index < len(self.channels):
+                self.channels[index] = ChannelRecord.from_json(data)
+
+    def apply_poll(
+        self, status: ServerStatus, error_message: Optional[str],
+        result: Optional[tuple[list[int], Optional[float], list[tuple[str, str]]]],
+        now: datetime
+    ) -> Optional[PollChanges]:
+        """原地写入轮询结果，只修改变化的字段；没有变化时返回 None（轮询时间总会更新）"""
+        fields = {}
+        changed: list[tuple[ChannelRecord, ChannelState, Optional[float]]] = []
+        replaced = False
+        if result is not None:
+            cpu_cores, cpu_avg, raw_channels = result
+            if cpu_cores != self.cpu_cores:
+                self.cpu_cores = fields["cpu_cores"] = cpu_cores
+            if cpu_avg != self.cpu_avg:
+                self.cpu_avg = fields["cpu_avg"] = cpu_avg
+            channels = self.channels
+            if len(raw_channels) == len(channels):
+                for ch, (raw_state, ch_status) in zip(channels, raw_channels):
+                    ch_state = _CHANNEL_STATES.get(raw_state, ChannelState.IDLE)
+                    if ch_state is ch.state and ch_status == ch.status:
+                        continue
+                    changed.append((ch, ch.state, ch.fps))
+                    ch.state = ch_state
+                    if ch_status != ch.status:
+                        ch.status = ch_status
+                        ch.uptime_seconds, ch.fps, ch.bitrate_kbps = parse_channel_status(ch_status)
+            else:
+                previous = {ch.id: ch for ch in channels}
+                self.channels = []
+                for idx, (raw_state, ch_status) in enumerate(raw_channels):
+                    ch = ChannelRecord(idx + 1, _CHANNEL_STATES.get(raw_state, ChannelState.IDLE), ch_status)
+                    self.channels.append(ch)
+                    prev = previous.get(ch.id)
+                    if prev is not None:
+                        changed.append((ch, prev.state, prev.fps))
+                replaced = True
+                fields["channels"] = [ch.to_json() for ch in self.channels]
+        if status is not self.status:
+            self.status = status
+            fields["status"] = status.value
+        if error_message != self.error_message:
+            self.error_message = fields["error_message"] = error_message
+        if self.stale:
+            self.stale = fields["stale"] = False
+        self.last_poll_time = now
+        if not fields and not changed:
+            return None
+        return PollChanges(fields, changed, replaced)
@@ -0,0 +1,50 @@
+"""状态快照持久化：重启后立即展示最后已知状态"""
+import gzip
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class StateStoreService:
+    """
+    将 GET /api/servers 的已编码响应 gzip 压缩后写入磁盘；
+    启动时读取，作为首次轮询完成前的过期数据
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return settings.state_snapshot_path is not None
+
+    @property
+    def _path(self) -> Path:
+        return Path(settings.state_snapshot_path)
+
+    def save(self, body: bytes):
+        """原子写入快照（在线程中调用，body 为已编码的不可变数据）"""
+        path = self._path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(gzip.compress(body, compresslevel=6))
+        os.replace(tmp_path, path)
+
+    def load(self) -> Optional[tuple[bytes, datetime]]:
+        """读取快照，返回 (响应体, 写入时间)；不存在或损坏时返回 None"""
+        path = self._path
+        try:
+            with open(path, "rb") as f:
+                body = gzip.decompress(f.read())
+            saved_at = datetime.fromtimestamp(os.stat(path).st_mtime)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError) as e:
+            logger.warning(f"Invalid state snapshot {path}: {e}")
+            return None
+        return body, saved_at
+
+# 全局单例
+state_store_service = StateStoreService()
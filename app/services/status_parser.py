@@ -0,0 +1,35 @@
+"""IPVTL 通道状态字符串解析"""
+import re
+from typing import NamedTuple, Optional
+
+# 示例: "12:34:56 30fps@1234Kbps"，运行时长可能带天数前缀 "2d 01:02:03"
+_UPTIME_RE = re.compile(r"(?:(\d+)\s*d\s*)?(\d+):(\d{1,2}):(\d{1,2})")
+_FPS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*fps", re.IGNORECASE)
+_BITRATE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*([KMG])bps", re.IGNORECASE)
+_BITRATE_SCALE = {"K": 1, "M": 1000, "G": 1000 * 1000}
+
+class ParsedStatus(NamedTuple):
+    """解析后的通道运行指标"""
+    uptime_seconds: Optional[int] = None
+    fps: Optional[float] = None
+    bitrate_kbps: Optional[int] = None
+
+EMPTY_STATUS = ParsedStatus()
+
+def parse_channel_status(status: str) -> ParsedStatus:
+    """解析通道状态字符串，无法识别的字段为 None"""
+    if not status:
+        return EMPTY_STATUS
+    uptime = fps = bitrate = None
+    m = _UPTIME_RE.search(status)
+    if m:
+        days, hours, minutes, seconds = m.groups()
+        uptime = (int(days or 0) * 86400 + int(hours) * 3600
+                  + int(minutes) * 60 + int(seconds))
+    m = _FPS_RE.search(status)
+    if m:
+        fps = float(m.group(1))
+    m = _BITRATE_RE.search(status)
+    if m:
+        bitrate = round(float(m.group(1)) * _BITRATE_SCALE[m.group(2).upper()])
+    return ParsedStatus(uptime, fps, bitrate)
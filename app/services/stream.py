@@ -0,0 +1,76 @@
+"""状态推送服务（Server-Sent Events）"""
+import asyncio
+import json
+import logging
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Subscriber:
+    """单个推送订阅者（对应一个浏览器连接）"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+class StreamService:
+    """状态变更广播：消息只编码一次，分发给所有订阅者"""
+
+    def __init__(self):
+        self._subscribers: set[Subscriber] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        """注册订阅者"""
+        sub = Subscriber(settings.stream_queue_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        """注销订阅者"""
+        sub.closed = True
+        self._subscribers.discard(sub)
+
+    @staticmethod
+    def encode(event: str, data) -> str:
+        """编码为 SSE 消息"""
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        return StreamService.encode_raw(event, payload)
+
+    @staticmethod
+    def encode_raw(event: str, payload: str) -> str:
+        """使用已编码的单行 JSON 构造 SSE 消息"""
+        return f"event: {event}\ndata: {payload}\n\n"
+
+    def publish(self, event: str, data):
+        """广播事件"""
+        if self._subscribers:
+            self.publish_raw(event, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+    def publish_raw(self, event: str, payload: str):
+        """广播已编码事件；消费过慢的订阅者会被断开，由客户端重连后重新获取快照"""
+        if not self._subscribers:
+            return
+        message = self.encode_raw(event, payload)
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("Stream subscriber too slow, dropping connection")
+                self.unsubscribe(sub)
+
+    def close_all(self):
+        """关闭所有订阅（应用关闭时调用）"""
+        for sub in list(self._subscribers):
+            self.unsubscribe(sub)
+            try:
+                sub.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+# 全局单例
+stream_service = StreamService()
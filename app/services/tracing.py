@@ -0,0 +1,206 @@
+"""轻量追踪：记录轮询与通道操作各阶段耗时，保留最近的慢操作"""
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+from app.config import settings
+from app.models import TraceInfo, TraceSpan
+
+class _Trace:
+    """一次操作（根追踪）及其全部阶段"""
+    __slots__ = ("name", "attributes", "started_at", "start", "duration", "error", "spans", "finished")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        # (名称, 相对开始时间, 耗时, 属性)，按结束顺序追加
+        self.spans: list[tuple[str, float, float, dict]] = []
+        self.finished = False
+
+    def to_model(self) -> TraceInfo:
+        return TraceInfo(
+            name=self.name, started_at=self.started_at,
+            duration_ms=round(self.duration * 1000, 3), error=self.error,
+            attributes=self.attributes,
+            spans=[
+                TraceSpan(
+                    name=name, start_ms=round(offset * 1000, 3),
+                    duration_ms=round(duration * 1000, 3), attributes=attributes
+                )
+                for name, offset, duration, attributes in sorted(self.spans, key=lambda s: s[1])
+            ]
+        )
+
+# 当前的 (根追踪, 最内层追踪范围的属性)；子任务创建时复制，阶段记录到同一个根追踪
+_current: ContextVar[Optional[tuple[_Trace, dict]]] = ContextVar("trace", default=None)
+
+def _active() -> Optional[tuple[_Trace, dict]]:
+    """当前追踪；在追踪中创建、但在其结束后仍运行的后台任务不再记录到该追踪"""
+    current = _current.get()
+    if current is None or current[0].finished:
+        return None
+    return current
+
+class _Noop:
+    """未启用或不在追踪中时使用的空上下文"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _Noop()
+
+class _Span:
+    __slots__ = ("trace", "name", "attributes", "start")
+
+    def __init__(self, trace: _Trace, name: str, attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        now = time.perf_counter()
+        if self.trace.finished:
+            return False
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.trace.spans.append(
+            (self.name, self.start - self.trace.start, now - self.start, self.attributes)
+        )
+        return False
+
+class _TraceScope:
+    """追踪范围：没有外层追踪时开始新的根追踪，否则作为外层追踪中的一个阶段"""
+    __slots__ = ("service", "name", "attributes", "token", "span")
+
+    def __init__(self, service: "TracingService", name: str, attributes: dict):
+        self.service = service
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        current = _active()
+        if current is None:
+            trace = _Trace(self.name, self.attributes)
+            self.span = None
+        else:
+            trace = current[0]
+            self.span = _Span(trace, self.name, self.attributes).__enter__()
+        self.token = _current.set((trace, self.attributes))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = _current.get()[0]
+        _current.reset(self.token)
+        if self.span is not None:
+            return self.span.__exit__(exc_type, exc, tb)
+        trace.duration = time.perf_counter() - trace.start
+        trace.finished = True
+        if exc_type is not None:
+            trace.error = exc_type.__name__
+        self.service._finish(trace)
+        return False
+
+class TracingService:
+    """
+    - trace() 标记一次操作（一次端点轮询、一次通道操作），span()/add_span() 记录其中的阶段；
+      在外层操作期间等待完成的嵌套操作（如通道操作后的轮询）作为外层操作的一个阶段，
+      外层操作结束后仍在运行的后台任务开始新的根追踪
+    - httpx_trace() 通过 httpx 的 trace 扩展记录连接（含 DNS 解析）、发送、等待响应头与读取响应体
+    - 耗时超过 tracing_slow_threshold 的操作保留在有限长度的缓冲中
+    未启用时各方法直接返回共享的空上下文，不记录时间
+    """
+
+    def __init__(self):
+        self.enabled = settings.tracing_enabled
+        self._slow: deque[_Trace] = deque(maxlen=settings.tracing_buffer_size)
+
+    def trace(self, name: str, **attributes):
+        if not self.enabled:
+            return _NOOP
+        return _TraceScope(self, name, attributes)
+
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return _NOOP
+        current = _active()
+        if current is None:
+            return _NOOP
+        return _Span(current[0], name, attributes)
+
+    def add_span(self, name: str, started: float, **attributes):
+        """记录从 started (perf_counter) 到现在的阶段，用于已有计时代码的位置"""
+        if not self.enabled:
+            return
+        current = _active()
+        if current is None:
+            return
+        trace = current[0]
+        trace.spans.append((name, started - trace.start, time.perf_counter() - started, attributes))
+
+    def annotate(self, **attributes):
+        """为最内层的追踪范围添加属性（如轮询结果）"""
+        if not self.enabled:
+            return
+        current = _active()
+        if current is not None:
+            current[1].update(attributes)
+
+    def httpx_trace(self) -> Optional[dict]:
+        """httpx 请求的 extensions 参数；不在追踪中时为 None"""
+        if not self.enabled:
+            return None
+        current = _active()
+        if current is None:
+            return None
+        trace = current[0]
+        pending: dict[str, float] = {}
+
+        async def callback(event: str, info: dict):
+            # 事件名如 connection.connect_tcp.started / http11.receive_response_headers.complete
+            step, _, phase = event.rpartition(".")
+            if phase == "started":
+                pending[step] = time.perf_counter()
+                return
+            started = pending.pop(step, None)
+            if started is not None and not trace.finished:
+                trace.spans.append((
+                    "http." + step.rpartition(".")[2], started - trace.start,
+                    time.perf_counter() - started, {"error": "failed"} if phase == "failed" else {}
+                ))
+
+        return {"trace": callback}
+
+    def _finish(self, trace: _Trace):
+        if trace.duration >= settings.tracing_slow_threshold:
+            self._slow.append(trace)
+
+    def slow_traces(
+        self, name: Optional[str] = None, min_ms: Optional[float] = None, limit: int = 50
+    ) -> list[TraceInfo]:
+        """最近的慢操作（新的在前）"""
+        result = []
+        for trace in reversed(self._slow):
+            if name is not None and trace.name != name:
+                continue
+            if min_ms is not None and trace.duration * 1000 < min_ms:
+                continue
+            result.append(trace.to_model())
+            if len(result) >= limit:
+                break
+        return result
+
+# 全局单例
+tracing_service = TracingService()
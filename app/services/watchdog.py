@@ -0,0 +1,224 @@
+"""通道看门狗：自动重启掉线或卡在停止中的通道"""
+import asyncio
+import contextvars
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from app.config import settings
+from app.models import (
+    ChannelAction, ChannelState, EventType, JournalEvent, ServerConfig, ServerStatus,
+    WatchdogIncident, WatchdogStatus
+)
+from app.services.journal import journal_service
+from app.services.manager import manager_service
+from app.services.metrics import WATCHDOG_RESTARTS_TOTAL
+from app.services.poller import poller_service
+from app.services.state_records import ServerRecord
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """令牌桶：容量 burst，每 refill_seconds 恢复一个令牌"""
+    __slots__ = ("burst", "refill_seconds", "tokens", "updated")
+
+    def __init__(self, burst: int, refill_seconds: float):
+        self.burst = burst
+        self.refill_seconds = refill_seconds
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def available(self) -> float:
+        now = time.monotonic()
+        if self.refill_seconds > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.refill_seconds)
+        self.updated = now
+        return self.tokens
+
+    def take(self):
+        self.tokens -= 1
+
+class _Incident:
+    """单个通道的异常与重启进度；恢复运行后保留到稳定运行 watchdog_reset_seconds 为止"""
+    __slots__ = ("state", "since", "attempts", "next_attempt_at", "running_since",
+                 "in_progress", "gave_up")
+
+    def __init__(self, state: ChannelState, now: datetime):
+        self.state: Optional[ChannelState] = state
+        self.since: Optional[datetime] = now
+        self.attempts = 0
+        self.next_attempt_at: Optional[datetime] = None
+        self.running_since: Optional[datetime] = None
+        self.in_progress = False
+        self.gave_up = False
+
+class WatchdogService:
+    """
+    通道被观察到运行、或通过本系统启动/重启后视为应运行；通过本系统停止后不再处理。
+    应运行的通道空闲或停止中超过设定时长时调用 ManagerService.restart_channel 重启：
+    - 每次重启需同时从该服务器与全集群的令牌桶各取一个令牌，避免故障版本引发重启风暴
+    - 同一通道重启后按指数退避，重启 watchdog_max_attempts 次仍未稳定运行则放弃，等待人工处理
+    - 每次尝试都写入事件日志
+    只在轮询进程中运行（主进程退出后由接管轮询的 worker 继续）；
+    多进程部署时其他 worker 上的手动停止不会通知看门狗
+    """
+
+    def __init__(self):
+        self._desired_running: set[tuple[str, int]] = set()
+        self._incidents: dict[tuple[str, int], _Incident] = {}
+        self._server_buckets: dict[str, TokenBucket] = {}
+        self._cluster_bucket = TokenBucket(
+            settings.watchdog_cluster_burst, settings.watchdog_cluster_refill_seconds
+        )
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.watchdog_enabled
+
+    async def start(self):
+        if not self.enabled:
+            return
+        poller_service.set_poll_listener(self.observe)
+        manager_service.set_action_listener(self._on_action)
+        logger.info("Channel watchdog enabled")
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def status(self) -> WatchdogStatus:
+        return WatchdogStatus(
+            enabled=self.enabled,
+            cluster_tokens=round(self._cluster_bucket.available(), 2),
+            incidents=[
+                WatchdogIncident(
+                    server_id=sid, channel_id=channel_id, state=incident.state,
+                    since=incident.since, attempts=incident.attempts,
+                    next_attempt_at=incident.next_attempt_at,
+                    in_progress=incident.in_progress, gave_up=incident.gave_up
+                )
+                for (sid, channel_id), incident in self._incidents.items()
+            ]
+        )
+
+    # ==================== 检测 ====================
+
+    def _on_action(self, server_id: str, channel_id: int, action: ChannelAction):
+        """手动操作：更新期望状态，并交由操作者处理（看门狗自身发起的重启除外）"""
+        key = (server_id, channel_id)
+        incident = self._incidents.get(key)
+        if incident is not None and incident.in_progress:
+            return
+        self._incidents.pop(key, None)
+        if action == ChannelAction.STOP:
+            self._desired_running.discard(key)
+        else:
+            self._desired_running.add(key)
+
+    def observe(self, config: ServerConfig, state: ServerRecord):
+        """
+        检查一台服务器的本次轮询结果（服务器不可达时通道状态未知，不处理）。
+        多进程部署中只有轮询主进程处理：非主进程的手动刷新与操作后轮询也会调用，
+        但各进程的令牌桶独立，在非主进程重启会重复操作并放大全集群限速
+        """
+        if not poller_service.is_polling_process or state.status != ServerStatus.ONLINE:
+            return
+        now = datetime.now()
+        for ch in state.channels:
+            key = (config.id, ch.id)
+            incident = self._incidents.get(key)
+            if ch.state == ChannelState.RUNNING:
+                self._desired_running.add(key)
+                if incident is not None and not incident.in_progress:
+                    if incident.state is not None:
+                        incident.state = incident.since = None
+                        incident.running_since = now
+                    elif (now - incident.running_since).total_seconds() >= settings.watchdog_reset_seconds:
+                        del self._incidents[key]
+                continue
+            if key not in self._desired_running:
+                continue
+            if incident is None:
+                incident = self._incidents[key] = _Incident(ch.state, now)
+            elif incident.state != ch.state:
+                incident.state, incident.since = ch.state, now
+            if incident.in_progress or incident.gave_up:
+                continue
+            threshold = (settings.watchdog_idle_seconds if ch.state == ChannelState.IDLE
+                         else settings.watchdog_stopping_seconds)
+            if (now - incident.since).total_seconds() < threshold:
+                continue
+            if incident.next_attempt_at is not None and now < incident.next_attempt_at:
+                continue
+            if incident.attempts >= settings.watchdog_max_attempts:
+                self._give_up(config, ch.id, incident)
+                continue
+            if not self._take_token(config.id):
+                WATCHDOG_RESTARTS_TOTAL.inc(outcome="rate_limited")
+                continue
+            incident.in_progress = True
+            incident.attempts += 1
+            # 在空白上下文中运行：重启是独立的操作，不属于触发它的轮询
+            task = asyncio.create_task(
+                self._restart(config, ch.id, incident, ch.state), context=contextvars.Context()
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _take_token(self, server_id: str) -> bool:
+        """同时从服务器与全集群令牌桶取令牌；任一不足时都不取"""
+        bucket = self._server_buckets.get(server_id)
+        if bucket is None:
+            bucket = self._server_buckets[server_id] = TokenBucket(
+                settings.watchdog_server_burst, settings.watchdog_server_refill_seconds
+            )
+        if bucket.available() < 1 or self._cluster_bucket.available() < 1:
+            return False
+        bucket.take()
+        self._cluster_bucket.take()
+        return True
+
+    # ==================== 重启 ====================
+
+    async def _restart(
+        self, config: ServerConfig, channel_id: int, incident: _Incident, state: ChannelState
+    ):
+        logger.warning(
+            f"Watchdog restarting channel {channel_id} on {config.name} "
+            f"({state.value}, attempt {incident.attempts}/{settings.watchdog_max_attempts})"
+        )
+        try:
+            result = await manager_service.restart_channel(config.id, channel_id)
+        finally:
+            incident.in_progress = False
+        # 成功后也保留退避：通道很快再次掉线时不会立即重复重启
+        delay = min(settings.watchdog_backoff_base * 2 ** (incident.attempts - 1),
+                    settings.watchdog_backoff_max)
+        incident.next_attempt_at = datetime.now() + timedelta(seconds=delay)
+        outcome = "success" if result.success else "failure"
+        WATCHDOG_RESTARTS_TOTAL.inc(outcome=outcome)
+        journal_service.record(JournalEvent(
+            time=datetime.now(), type=EventType.WATCHDOG_RESTART,
+            server_id=config.id, channel_id=channel_id,
+            previous=state.value, current=outcome,
+            message=f"attempt {incident.attempts}/{settings.watchdog_max_attempts}: {result.message}"
+        ))
+
+    def _give_up(self, config: ServerConfig, channel_id: int, incident: _Incident):
+        """重试次数用尽：不再自动重启，直到手动操作或通道稳定运行"""
+        incident.gave_up = True
+        incident.next_attempt_at = None
+        WATCHDOG_RESTARTS_TOTAL.inc(outcome="gave_up")
+        logger.error(f"Watchdog gave up on channel {channel_id} on {config.name}")
+        journal_service.record(JournalEvent(
+            time=datetime.now(), type=EventType.WATCHDOG_RESTART,
+            server_id=config.id, channel_id=channel_id,
+            previous=incident.state.value, current="gave_up",
+            message=f"{incident.attempts} restarts did not keep the channel running"
+        ))
+
+# 全局单例
+watchdog_service = WatchdogService()
@@ -0,0 +1 @@
+"""IPVTL 集群模拟器与性能基准"""
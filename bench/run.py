@@ -0,0 +1,257 @@
+"""
+轮询与 API 性能基准
+
+启动模拟器后，对每个集群规模在独立子进程中运行一次基准（避免规模之间互相影响内存统计），
+输出轮询周期耗时、新鲜度偏差、API 延迟分位数与单服务器内存占用。
+
+用法:
+    python -m bench.run                       # 默认 10 / 500 / 5000 台
+    python -m bench.run --sizes 500 --latency 0.05 --failure-rate 0.02 --json result.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+from bench.simulator import servers_config
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+def _summary(values: list[float]) -> dict:
+    """毫秒为单位的分位数"""
+    return {
+        "p50_ms": round(_percentile(values, 0.5) * 1000, 3),
+        "p99_ms": round(_percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3),
+        "n": len(values),
+    }
+
+# ==================== 子进程：单个规模 ====================
+
+async def _measure_memory(size: int) -> dict:
+    """首次加载与轮询后的 Python 堆增量（tracemalloc）"""
+    import tracemalloc
+    from app.config import settings
+    from app.services.poller import poller_service
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    poller_service._load_servers()
+    poller_service._client = httpx.AsyncClient(timeout=settings.poll_timeout)
+    await poller_service._poll_all()
+    poller_service.snapshot_json()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = history = 0
+    for stat in after.compare_to(before, "filename"):
+        total += stat.size_diff
+        if stat.traceback[0].filename.endswith(os.path.join("services", "history.py")):
+            history += stat.size_diff
+    return {
+        "bytes_per_server": total // size,
+        "history_bytes_per_server": history // size,
+    }
+
+async def _measure_sweeps(sweeps: int) -> dict:
+    """全量轮询耗时，以及同一轮内最早与最晚完成轮询的时间差"""
+    from app.services.poller import poller_service
+
+    durations, skews = [], []
+    for _ in range(sweeps):
+        started = time.monotonic()
+        await poller_service._poll_all()
+        durations.append(time.monotonic() - started)
+        polled = [t for t in poller_service._polled_at.values() if t >= started]
+        skews.append(max(polled) - min(polled) if polled else 0.0)
+    return {
+        "sweep_s": [round(d, 3) for d in durations],
+        "sweep_skew_s": [round(s, 3) for s in skews],
+    }
+
+async def _measure_schedule(seconds: float) -> dict:
+    """按调度器运行一段时间，采样最久未轮询服务器的时长"""
+    from app.config import settings
+    from app.services.metrics import POLL_LATE_TOTAL
+    from app.services.poller import poller_service
+
+    late_before = POLL_LATE_TOTAL._values[()]
+    poller_service._start_polling()
+    ages = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.25)
+        ages.append(poller_service._oldest_poll_age())
+    poller_service._poll_task.cancel()
+    try:
+        await poller_service._poll_task
+    except asyncio.CancelledError:
+        pass
+    poller_service._poll_task = None
+    return {
+        "interval_s": settings.poll_interval,
+        "observed_s": seconds,
+        "max_staleness_s": round(max(ages), 3) if ages else None,
+        "late_polls": int(POLL_LATE_TOTAL._values[()] - late_before),
+    }
+
+async def _measure_api(requests: int) -> dict:
+    """通过 ASGI 进程内调用测量接口延迟（不含网络开销）"""
+    from app.main import app
+    from app.services.poller import poller_service
+
+    server_ids = list(poller_service._servers)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def timed(name: str, count: int, path_for, before=None):
+            samples = []
+            for i in range(count):
+                if before:
+                    before()
+                started = time.perf_counter()
+                resp = await client.get(path_for(i))
+                samples.append(time.perf_counter() - started)
+                resp.raise_for_status()
+            results[name] = _summary(samples)
+
+        def invalidate():
+            # 模拟每次请求之间状态都发生了变化，测量完整序列化成本
+            poller_service._version = poller_service._next_version()
+
+        await timed("servers", requests, lambda i: "/api/servers")
+        await timed("servers_uncached", max(5, requests // 10), lambda i: "/api/servers", invalidate)
+        await timed("servers_filtered", requests,
+                    lambda i: "/api/servers?status=offline&status=error&fields=status,error_message")
+        await timed("server_detail", requests,
+                    lambda i: f"/api/servers/{server_ids[i % len(server_ids)]}")
+        await timed("channels_filtered", max(5, requests // 10), lambda i: "/api/channels?state=idle")
+    return results
+
+async def _worker(args) -> dict:
+    from app.services.poller import poller_service
+
+    # 模拟故障时每次轮询都会记录警告，基准输出中不需要
+    logging.disable(logging.WARNING)
+
+    size = len(json.loads(Path(args.config).read_text(encoding="utf-8"))["servers"])
+    result = {"servers": size}
+    result["memory"] = await _measure_memory(size)
+    result["poll"] = await _measure_sweeps(args.sweeps)
+    if args.observe > 0:
+        result["schedule"] = await _measure_schedule(args.observe)
+    result["api"] = await _measure_api(args.requests)
+    await poller_service.stop()
+    return result
+
+# ==================== 主进程 ====================
+
+def _start_simulator(args, nodes: int, port: int) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "bench.simulator", "--port", str(port), "--nodes", str(nodes),
+        "--channels", str(args.channels), "--latency", str(args.latency),
+        "--jitter", str(args.jitter), "--failure-rate", str(args.failure_rate),
+        "--dead-fraction", str(args.dead_fraction),
+    ]
+    proc = subprocess.Popen(cmd)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/_sim/stats", timeout=1).raise_for_status()
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Simulator did not start")
+
+def _run_size(args, size: int, port: int, workdir: Path) -> dict:
+    config_path = workdir / f"servers-{size}.json"
+    config_path.write_text(
+        json.dumps(servers_config(size, port, args.servers_per_endpoint)), encoding="utf-8"
+    )
+    env = dict(os.environ)
+    env.update({
+        "IPVTL_SERVERS_CONFIG_PATH": str(config_path),
+        "IPVTL_POLL_MAX_CONCURRENT": str(args.concurrency),
+        "IPVTL_POLL_TIMEOUT": str(args.timeout),
+        "IPVTL_POLL_INTERVAL": str(args.interval),
+    })
+    cmd = [
+        sys.executable, "-m", "bench.run", "--worker", "--config", str(config_path),
+        "--sweeps", str(args.sweeps), "--requests", str(args.requests),
+        "--observe", str(args.observe),
+    ]
+    out = subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def _print_report(results: list[dict]):
+    print()
+    print(f"{'servers':>8} {'sweep(s)':>9} {'skew(s)':>8} {'stale(s)':>9} {'mem/srv':>9} "
+          f"{'hist/srv':>9}  api p50/p99 (ms)")
+    for r in results:
+        poll = r["poll"]
+        stale = r.get("schedule", {}).get("max_staleness_s")
+        api = "  ".join(f"{name}={v['p50_ms']}/{v['p99_ms']}" for name, v in r["api"].items())
+        print(f"{r['servers']:>8} {min(poll['sweep_s']):>9.3f} {max(poll['sweep_skew_s']):>8.3f} "
+              f"{stale if stale is not None else '-':>9} "
+              f"{r['memory']['bytes_per_server'] / 1024:>8.1f}K "
+              f"{r['memory']['history_bytes_per_server'] / 1024:>8.1f}K  {api}")
+
+def main():
+    parser = argparse.ArgumentParser(description="IPVTL poller/API benchmark")
+    parser.add_argument("--sizes", default="10,500,5000", help="集群规模，逗号分隔")
+    parser.add_argument("--channels", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--dead-fraction", type=float, default=0.0)
+    parser.add_argument("--servers-per-endpoint", type=int, default=1,
+                        help="多个逻辑服务器共用同一 IPVTL 端点")
+    parser.add_argument("--concurrency", type=int, default=10, help="IPVTL_POLL_MAX_CONCURRENT")
+    parser.add_argument("--timeout", type=float, default=2.0, help="IPVTL_POLL_TIMEOUT")
+    parser.add_argument("--interval", type=int, default=5, help="调度观察阶段的 IPVTL_POLL_INTERVAL")
+    parser.add_argument("--sweeps", type=int, default=3)
+    parser.add_argument("--observe", type=float, default=10.0, help="调度观察时长(秒)，0 为跳过")
+    parser.add_argument("--requests", type=int, default=200, help="每个接口的请求次数")
+    parser.add_argument("--json", help="结果写入 JSON 文件")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_worker(args))))
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    port = _free_port()
+    simulator = _start_simulator(args, max(sizes), port)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in sizes:
+                print(f"Benchmarking {size} servers...", file=sys.stderr)
+                results.append(_run_size(args, size, port, Path(workdir)))
+    finally:
+        simulator.terminate()
+        simulator.wait()
+    _print_report(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
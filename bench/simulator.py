@@ -0,0 +1,188 @@
+"""
+IPVTL 集群模拟器
+
+单个进程模拟成千上万个 IPVTL 节点：监听 0.0.0.0:<port>，按请求的目标地址区分节点
+（Linux 下 127.0.0.0/8 整段都指向本机，节点 i 使用 127.x.y.z 地址）。
+
+用法:
+    python -m bench.simulator --nodes 500 --write-config /tmp/sim-servers.json
+    IPVTL_SERVERS_CONFIG_PATH=/tmp/sim-servers.json uvicorn app.main:app
+
+告警 webhook 可指向 http://127.0.0.1:<port>/_sim/webhook，GET 同一地址查看收到的通知。
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+@dataclass
+class SimConfig:
+    """模拟参数"""
+    nodes: int = 500
+    channels: int = 16
+    cores: int = 8
+    latency: float = 0.02  # 平均响应延迟(秒)
+    jitter: float = 0.01  # 延迟标准差(秒)
+    failure_rate: float = 0.0  # 返回 HTTP 500 的概率
+    dead_fraction: float = 0.0  # 永不响应的节点比例（触发客户端超时）
+    stop_duration: float = 2.0  # stopping -> idle 所需时间(秒)
+    drop_rate: float = 0.0  # 每次查询时运行中通道意外掉线的概率
+    running_fraction: float = 0.8  # 初始运行中通道比例
+
+def node_host(index: int) -> str:
+    """节点 i 对应的回环地址（从 127.0.0.1 开始）"""
+    n = index + 1
+    return f"127.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+
+class SimChannel:
+    __slots__ = ("state", "started_at", "idle_at", "fps", "bitrate")
+
+    def __init__(self, running: bool):
+        self.state = "running" if running else "idle"
+        self.started_at = time.time() - random.uniform(0, 86400)
+        self.idle_at = 0.0
+        self.fps = random.choice((25, 30, 50, 60))
+        self.bitrate = random.randint(800, 8000)
+
+    def status(self, now: float) -> str:
+        if self.state != "running":
+            return ""
+        uptime = int(now - self.started_at)
+        fps = max(0, self.fps - random.choice((0, 0, 0, 1, 2, 10)))
+        bitrate = int(self.bitrate * random.uniform(0.9, 1.1))
+        return f"{uptime // 3600:02d}:{uptime // 60 % 60:02d}:{uptime % 60:02d} {fps}fps@{bitrate}Kbps"
+
+class SimNode:
+    __slots__ = ("dead", "cores", "channels")
+
+    def __init__(self, config: SimConfig):
+        self.dead = random.random() < config.dead_fraction
+        self.cores = [random.randint(5, 60) for _ in range(config.cores)]
+        self.channels = [
+            SimChannel(random.random() < config.running_fraction)
+            for _ in range(config.channels)
+        ]
+
+class Simulator:
+    """模拟节点集合及请求统计"""
+
+    def __init__(self, config: SimConfig):
+        self.config = config
+        self.nodes: dict[str, SimNode] = {
+            node_host(i): SimNode(config) for i in range(config.nodes)
+        }
+        self.requests = 0
+        self.actions = 0
+        self.webhook_posts = 0
+        self.webhook_alerts: list[dict] = []
+
+    def node(self, request: Request) -> Optional[SimNode]:
+        host = (request.headers.get("host") or "").rsplit(":", 1)[0]
+        return self.nodes.get(host)
+
+    async def delay(self, node: SimNode):
+        if node.dead:
+            await asyncio.sleep(3600)
+        latency = random.gauss(self.config.latency, self.config.jitter)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+    def advance(self, node: SimNode, now: float):
+        """推进通道状态：停止完成、随机掉线、CPU 波动"""
+        for ch in node.channels:
+            if ch.state == "stopping" and now >= ch.idle_at:
+                ch.state = "idle"
+            elif ch.state == "running" and self.config.drop_rate and random.random() < self.config.drop_rate:
+                ch.state = "idle"
+        node.cores = [min(100, max(0, v + random.randint(-5, 5))) for v in node.cores]
+
+    async def status(self, request: Request) -> Response:
+        self.requests += 1
+        node = self.node(request)
+        if node is None:
+            return PlainTextResponse("unknown node", status_code=404)
+        await self.delay(node)
+        if random.random() < self.config.failure_rate:
+            return PlainTextResponse("simulated failure", status_code=500)
+        now = time.time()
+        self.advance(node, now)
+        return JSONResponse({
+            "channels": [{"state": ch.state, "status": ch.status(now)} for ch in node.channels],
+            "cpu": node.cores,
+        })
+
+    async def channel(self, request: Request) -> Response:
+        self.actions += 1
+        node = self.node(request)
+        index = request.path_params["channel_id"] - 1
+        if node is None or not 0 <= index < len(node.channels):
+            return PlainTextResponse("not found", status_code=404)
+        await self.delay(node)
+        ch = node.channels[index]
+        if "stop" in request.query_params and ch.state == "running":
+            ch.state = "stopping"
+            ch.idle_at = time.time() + self.config.stop_duration
+        elif "start" in request.query_params and ch.state == "idle":
+            ch.state = "running"
+            ch.started_at = time.time()
+        return PlainTextResponse("OK")
+
+    async def webhook(self, request: Request) -> Response:
+        """告警 webhook 接收端：记录收到的通知"""
+        if request.method == "GET":
+            return JSONResponse({"posts": self.webhook_posts, "alerts": self.webhook_alerts[-1000:]})
+        body = await request.json()
+        self.webhook_posts += 1
+        self.webhook_alerts.extend(body.get("alerts", []))
+        return PlainTextResponse("OK")
+
+    async def stats(self, request: Request) -> Response:
+        return JSONResponse({
+            "nodes": len(self.nodes), "requests": self.requests, "actions": self.actions,
+            "webhook_posts": self.webhook_posts, "webhook_alerts": len(self.webhook_alerts),
+        })
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/status", self.status),
+            Route("/channel{channel_id:int}", self.channel),
+            Route("/_sim/stats", self.stats),
+            Route("/_sim/webhook", self.webhook, methods=["GET", "POST"]),
+        ])
+
+def servers_config(count: int, port: int, servers_per_node: int = 1) -> dict:
+    """生成对应的 servers.json 内容；servers_per_node > 1 时多个逻辑服务器共用同一节点"""
+    return {"servers": [
+        {"id": f"sim-{i:05d}", "name": f"Sim{i:05d}", "host": node_host(i // servers_per_node),
+         "port": port, "description": f"group-{i % 10}"}
+        for i in range(count)
+    ]}
+
+def main():
+    parser = argparse.ArgumentParser(description="IPVTL cluster simulator")
+    parser.add_argument("--port", type=int, default=19527)
+    parser.add_argument("--write-config", help="写出 servers.json 到该路径")
+    parser.add_argument("--servers-per-node", type=int, default=1, help="每个节点对应的逻辑服务器数")
+    defaults = SimConfig()
+    for field, value in vars(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+    config = SimConfig(**{field: getattr(args, field) for field in vars(defaults)})
+    if args.write_config:
+        with open(args.write_config, "w", encoding="utf-8") as f:
+            json.dump(servers_config(config.nodes * args.servers_per_node, args.port,
+                                     args.servers_per_node), f, ensure_ascii=False, indent=2)
+    simulator = Simulator(config)
+    uvicorn.run(simulator.app(), host="0.0.0.0", port=args.port, log_level="warning",
+                backlog=4096, timeout_keep_alive=60)
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,94 @@ IPVTL_DEBUG=false
 
 # 服务器配置文件路径
 IPVTL_SERVERS_CONFIG_PATH=servers/servers.json
+# 配置文件变化时自动增量重新加载（0 为关闭）
+IPVTL_SERVERS_WATCH_INTERVAL=5.0
 
 # 轮询配置
 IPVTL_POLL_INTERVAL=30
 IPVTL_POLL_TIMEOUT=10.0
 IPVTL_POLL_MAX_CONCURRENT=10
+IPVTL_POLL_FAST_INTERVAL=5.0
+IPVTL_POLL_BACKOFF_MAX=300.0
+IPVTL_POLL_JITTER=0.1
+IPVTL_POLL_FRESH_WINDOW=2.0
+
+# HTTP 连接池：保活时间应大于轮询间隔；默认不限制连接数，设置时应不少于端点数
+# IPVTL_HTTP_MAX_CONNECTIONS=2000
+IPVTL_HTTP_KEEPALIVE_EXPIRY=60.0
+
+# 断路器：端点连续连接失败后，通道操作立即失败，轮询改为定期探测
+IPVTL_BREAKER_FAILURE_THRESHOLD=3
+IPVTL_BREAKER_OPEN_SECONDS=30.0
+IPVTL_BREAKER_PROBE_TIMEOUT=2.0
+
+# 多进程部署 (gunicorn -w N)：设置后仅一个 worker 轮询，其余读取共享快照
+# IPVTL_SHARED_STATE_PATH=/dev/shm/ipvtl-state.json
+IPVTL_SHARED_STATE_SYNC_INTERVAL=1.0
+
+# 状态快照：重启后在首次轮询完成前展示最后已知状态（标记为过期）
+IPVTL_STATE_SNAPSHOT_PATH=data/state.json.gz
+IPVTL_STATE_SNAPSHOT_INTERVAL=60.0
+
+# 聚合模式：订阅各站点管理实例的状态推送并合并展示（站点列表示例见 servers/sites.json）
+# IPVTL_FEDERATION_CONFIG_PATH=servers/sites.json
+IPVTL_FEDERATION_CONNECT_TIMEOUT=5.0
+IPVTL_FEDERATION_READ_TIMEOUT=60.0
+IPVTL_FEDERATION_RETRY_MAX=30.0
+IPVTL_FEDERATION_ACTION_TIMEOUT=90.0
 
 # 通道操作超时
 IPVTL_CHANNEL_STOP_TIMEOUT=30.0
 IPVTL_CHANNEL_START_TIMEOUT=30.0
-IPVTL_CHANNEL_RESTART_DELAY=2.0
+IPVTL_CHANNEL_READY_POLL_INTERVAL=0.5
+IPVTL_CHANNEL_PER_HOST_CONCURRENT=4
+
+# 批量任务
+IPVTL_JOB_MAX_CONCURRENT=20
+IPVTL_JOB_PER_SERVER_CONCURRENT=4
+IPVTL_JOB_HISTORY_SIZE=100
+
+# 历史数据
+IPVTL_HISTORY_CAPACITY=2880
+IPVTL_HISTORY_MAX_POINTS=2000
+
+# 事件日志（通道状态变化/帧率骤降/服务器上下线）
+# 多进程部署时只由轮询主进程写入，其他 worker 跟踪该文件中的新事件
+IPVTL_JOURNAL_PATH=data/events.jsonl
+IPVTL_JOURNAL_MAX_BYTES=10485760
+IPVTL_JOURNAL_BACKUPS=5
+IPVTL_JOURNAL_FLUSH_INTERVAL=1.0
+IPVTL_JOURNAL_MEMORY_SIZE=10000
+IPVTL_JOURNAL_FPS_DROP_RATIO=0.3
+
+# 告警（规则与 webhook 见 servers/alerts.json）
+IPVTL_ALERTS_CONFIG_PATH=servers/alerts.json
+IPVTL_ALERT_BATCH_INTERVAL=5.0
+IPVTL_ALERT_WEBHOOK_TIMEOUT=5.0
+IPVTL_ALERT_MAX_PENDING=1000
+IPVTL_ALERT_HISTORY_SIZE=1000
+
+# 通道看门狗（默认关闭）：自动重启掉线或卡在停止中的通道，按服务器与全集群令牌桶限速
+IPVTL_WATCHDOG_ENABLED=false
+IPVTL_WATCHDOG_IDLE_SECONDS=60.0
+IPVTL_WATCHDOG_STOPPING_SECONDS=120.0
+IPVTL_WATCHDOG_SERVER_BURST=3
+IPVTL_WATCHDOG_SERVER_REFILL_SECONDS=300.0
+IPVTL_WATCHDOG_CLUSTER_BURST=10
+IPVTL_WATCHDOG_CLUSTER_REFILL_SECONDS=30.0
+IPVTL_WATCHDOG_MAX_ATTEMPTS=3
+IPVTL_WATCHDOG_BACKOFF_BASE=30.0
+IPVTL_WATCHDOG_BACKOFF_MAX=900.0
+IPVTL_WATCHDOG_RESET_SECONDS=600.0
+
+# 实时推送
+IPVTL_STREAM_HEARTBEAT=15.0
+IPVTL_STREAM_QUEUE_SIZE=256
+
+# 诊断（默认关闭）：慢操作分阶段追踪 GET /api/debug/traces，采样分析 POST /api/debug/profile
+IPVTL_TRACING_ENABLED=false
+IPVTL_TRACING_SLOW_THRESHOLD=1.0
+IPVTL_TRACING_BUFFER_SIZE=100
+IPVTL_PROFILER_ENABLED=false
+IPVTL_PROFILER_MAX_SECONDS=30.0
+IPVTL_PROFILER_INTERVAL=0.005
@@ -0,0 +1,46 @@
+"""告警规则引擎测试"""
+from datetime import datetime, timedelta
+from app.models import AlertMetric, AlertOperator, AlertRule, ServerConfig, ServerStatus
+from app.services.alerts import AlertService
+from app.services.state_records import ServerRecord
+
+_CONFIG = ServerConfig(id="al-1", name="al-1", host="127.0.0.1", port=1)
+
+def _service(**rule) -> AlertService:
+    service = AlertService()
+    service._rules = [AlertRule(
+        name="cpu_high", metric=AlertMetric.CPU_AVG, op=AlertOperator.GT, value=90, **rule
+    )]
+    return service
+
+def _state(cpu_avg: float, polled_at: datetime, status=ServerStatus.ONLINE) -> ServerRecord:
+    state = ServerRecord(_CONFIG.id)
+    state.status = status
+    state.cpu_avg = cpu_avg
+    state.last_poll_time = polled_at
+    return state
+
+def test_manual_polls_do_not_count_toward_for_polls():
+    service = _service(for_polls=2)
+    now = datetime.now()
+    service.evaluate(_CONFIG, _state(95, now))
+    service.evaluate(_CONFIG, _state(95, now), count_poll=False)
+    assert service.active() == []
+    service.evaluate(_CONFIG, _state(95, now))
+    assert [alert.rule for alert in service.active()] == ["cpu_high"]
+
+def test_for_seconds_fires_without_another_poll():
+    service = _service(for_seconds=60)
+    service.evaluate(_CONFIG, _state(95, datetime.now() - timedelta(seconds=61)))
+    assert service.active() == []
+    service._check_durations()
+    alerts = service.active()
+    assert [(alert.rule, alert.value) for alert in alerts] == [("cpu_high", 95)]
+
+def test_held_progress_does_not_fire_on_timer():
+    service = _service(for_seconds=60)
+    service.evaluate(_CONFIG, _state(95, datetime.now() - timedelta(seconds=61)))
+    # 服务器不可达：保持进度，但 CPU 是旧值，不按时间触发
+    service.evaluate(_CONFIG, _state(95, datetime.now(), status=ServerStatus.OFFLINE))
+    service._check_durations()
+    assert service.active() == []
@@ -0,0 +1,39 @@
+"""断路器测试"""
+import asyncio
+import pytest
+from app.config import settings
+from app.models import CircuitState
+from app.services.breaker import BreakerService, CircuitOpenError, breaker_service
+from app.services.poller import PollerService
+
+def _cooled_down(service: BreakerService, endpoint: str):
+    """连续失败打开断路器，并让冷却期结束"""
+    for _ in range(settings.breaker_failure_threshold):
+        service.record_failure(endpoint)
+    assert service.state(endpoint) == CircuitState.OPEN
+    service._breakers[endpoint].opened_at -= settings.breaker_open_seconds
+
+def test_check_respects_probe_slot():
+    service = BreakerService()
+    _cooled_down(service, "http://b1")
+    service.check("http://b1")
+    assert service.allow("http://b1")
+    assert service.state("http://b1") == CircuitState.HALF_OPEN
+    # 探测进行中：其他请求（如通道操作）不能绕过探测名额
+    with pytest.raises(CircuitOpenError):
+        service.check("http://b1")
+    with pytest.raises(CircuitOpenError):
+        service.acquire("http://b1")
+    service.release("http://b1")
+    service.acquire("http://b1")
+
+def test_poll_of_removed_endpoint_releases_probe():
+    endpoint = "http://b2"
+    _cooled_down(breaker_service, endpoint)
+    poller = PollerService()
+    # 端点不在配置中：轮询在发出请求前返回
+    asyncio.run(poller._poll_endpoint(endpoint))
+    try:
+        assert breaker_service.allow(endpoint)
+    finally:
+        breaker_service.remove(endpoint)
@@ -0,0 +1,51 @@
+"""事件日志查询 API 测试"""
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import EventType, JournalEvent
+from app.services.journal import journal_service
+
+client = TestClient(app)
+
+def _record(server_id: str) -> datetime:
+    now = datetime.now().replace(microsecond=0)
+    journal_service.record(JournalEvent(
+        time=now, type=EventType.SERVER_OFFLINE, server_id=server_id
+    ))
+    return now
+
+def _query(server_id: str, start: datetime, end: datetime) -> list[dict]:
+    resp = client.get("/api/events", params={
+        "server_id": server_id, "start": start.isoformat(), "end": end.isoformat()
+    })
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+def test_query_with_utc_z_suffix():
+    when = _record("tz-utc")
+    start = (when - timedelta(minutes=1)).astimezone(timezone.utc)
+    end = (when + timedelta(minutes=1)).astimezone(timezone.utc)
+    resp = client.get("/api/events", params={
+        "server_id": "tz-utc",
+        "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    })
+    assert resp.status_code == 200, resp.text
+    assert len(resp.json()) == 1
+
+def test_query_with_offset():
+    when = _record("tz-offset")
+    tz = timezone(timedelta(hours=8))
+    start = (when - timedelta(minutes=1)).astimezone(tz)
+    end = (when + timedelta(minutes=1)).astimezone(tz)
+    assert len(_query("tz-offset", start, end)) == 1
+    # 换算为本地时间后在事件之后
+    assert _query("tz-offset", (when + timedelta(seconds=1)).astimezone(tz), end) == []
+
+def test_aware_end_before_start():
+    tz = timezone(timedelta(hours=8))
+    start = datetime.now(tz)
+    resp = client.get("/api/events", params={
+        "start": start.isoformat(), "end": (start - timedelta(hours=1)).isoformat()
+    })
+    assert resp.status_code == 400
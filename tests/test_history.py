@@ -0,0 +1,23 @@
+"""历史数据环形缓冲测试"""
+from app.models import HistoryMetric
+from app.services.history import ServerHistory
+
+def test_later_poll_in_same_bucket_overwrites():
+    history = ServerHistory(capacity=3, interval=30)
+    history.append(60, 10.0, [])
+    # 加速轮询：同一时间段内的后续采样覆盖，保留最新值
+    history.append(75, 20.0, [])
+    history.append(89, 30.0, [(1, 25.0, 2000)])
+    history.append(90, 40.0, [])
+    cpu = history.column(HistoryMetric.CPU_AVG, None)
+    assert list(history.samples(cpu, 0)) == [(89, 30.0), (90, 40.0)]
+    fps = history.column(HistoryMetric.FPS, 1)
+    assert list(history.samples(fps, 0))[0] == (89, 25.0)
+
+def test_overwrite_after_wraparound():
+    history = ServerHistory(capacity=2, interval=30)
+    for ts in (0, 30, 60):
+        history.append(ts, float(ts), [])
+    history.append(61, 1.0, [])
+    cpu = history.column(HistoryMetric.CPU_AVG, None)
+    assert list(history.samples(cpu, 0)) == [(30, 30.0), (61, 1.0)]
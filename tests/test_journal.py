@@ -0,0 +1,24 @@
+"""事件日志测试"""
+from datetime import datetime
+from app.config import settings
+from app.models import EventType, JournalEvent
+from app.services.journal import JournalService
+
+def _event(server_id: str) -> JournalEvent:
+    return JournalEvent(time=datetime.now(), type=EventType.SERVER_OFFLINE, server_id=server_id)
+
+def test_follower_reads_new_events_across_rotation(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "journal_path", tmp_path / "events.jsonl")
+    writer, follower = JournalService(), JournalService()
+    writer._write([_event("before")])
+    # 首次跟踪只记录位置，不读取已有事件
+    assert follower._read_new() == []
+    writer._write([_event("a"), _event("b")])
+    assert [e.server_id for e in follower._read_new()] == ["a", "b"]
+    # c 写入后文件轮转，d 写入新文件：c 需从轮转后的旧文件读取
+    writer._write([_event("c")])
+    monkeypatch.setattr(settings, "journal_max_bytes", 1)
+    writer._write([_event("d")])
+    assert (tmp_path / "events.jsonl.1").exists()
+    assert [e.server_id for e in follower._read_new()] == ["c", "d"]
+    assert follower._read_new() == []
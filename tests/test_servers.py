@@ -0,0 +1,15 @@
+"""服务器列表 API 测试"""
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def test_page_without_limit_is_rejected():
+    resp = client.get("/api/servers", params={"page": 2})
+    assert resp.status_code == 422
+    assert resp.json()["detail"] == "page requires limit"
+
+def test_page_with_limit():
+    resp = client.get("/api/servers", params={"page": 2, "limit": 1})
+    assert resp.status_code == 200, resp.text
+    assert "X-Total-Count" in resp.headers
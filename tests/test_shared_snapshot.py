@@ -0,0 +1,34 @@
+"""多进程部署：非主进程应用主进程快照"""
+from datetime import datetime, timedelta
+from app.models import ServerConfig, ServerStatus
+from app.services.poller import PollerService
+from app.services.shared_state import SharedSnapshot
+from app.services.state_records import ServerRecord
+
+_SERVERS = [ServerConfig(id=f"ss-{i}", name=f"ss-{i}", host="127.0.0.1", port=9000 + i) for i in range(2)]
+
+def _poller(polled_at: datetime, version: int) -> PollerService:
+    poller = PollerService()
+    for config in _SERVERS:
+        state = ServerRecord(config.id)
+        state.status = ServerStatus.ONLINE
+        state.last_poll_time = polled_at
+        poller._servers[config.id] = config
+        poller._states[config.id] = state
+        poller._server_versions[config.id] = version
+    poller._version = version
+    return poller
+
+def test_kept_local_server_keeps_local_version():
+    now = datetime.now()
+    leader = _poller(now - timedelta(seconds=5), version=100)
+    follower = _poller(now - timedelta(seconds=10), version=50)
+    # 非主进程刚手动刷新过 ss-1：比主进程快照更新，保留本地结果
+    follower._states["ss-1"].last_poll_time = now
+    follower._server_versions["ss-1"] = 200
+    follower._apply_shared_snapshot(SharedSnapshot(
+        leader._version, dict(leader._server_versions), leader.snapshot_json().body
+    ))
+    assert follower._states["ss-1"].last_poll_time == now
+    assert follower._server_versions == {"ss-0": 100, "ss-1": 200}
+    assert follower._version > leader._version
@@ -0,0 +1,44 @@
+"""通道看门狗测试"""
+import asyncio
+from app.config import settings
+from app.models import ChannelState, ChannelActionResult, ServerConfig, ServerStatus
+from app.services.manager import manager_service
+from app.services.shared_state import shared_state_service
+from app.services.state_records import ChannelRecord, ServerRecord
+from app.services.watchdog import WatchdogService
+
+def _observe_idle_channel(monkeypatch) -> list[tuple[str, int]]:
+    """让一个应运行的通道空闲超过阈值，返回看门狗发起的重启"""
+    calls = []
+
+    async def restart_channel(server_id: str, channel_id: int) -> ChannelActionResult:
+        calls.append((server_id, channel_id))
+        return ChannelActionResult(success=True, message="ok", channel_id=channel_id, server_id=server_id)
+
+    monkeypatch.setattr(manager_service, "restart_channel", restart_channel)
+    monkeypatch.setattr(settings, "watchdog_idle_seconds", 0.0)
+    config = ServerConfig(id="wd-1", name="wd-1", host="127.0.0.1", port=1)
+    state = ServerRecord(config.id)
+    state.status = ServerStatus.ONLINE
+    state.channels = [ChannelRecord(1, ChannelState.RUNNING, "")]
+
+    async def run():
+        watchdog = WatchdogService()
+        watchdog.observe(config, state)
+        state.channels[0].state = ChannelState.IDLE
+        watchdog.observe(config, state)
+        await asyncio.sleep(0)
+        await watchdog.stop()
+
+    asyncio.run(run())
+    return calls
+
+def test_polling_process_restarts(monkeypatch):
+    monkeypatch.setattr(settings, "shared_state_path", None)
+    assert _observe_idle_channel(monkeypatch) == [("wd-1", 1)]
+
+def test_follower_never_restarts(tmp_path, monkeypatch):
+    # 启用多进程共享但未取得主进程锁：本进程为非主进程
+    monkeypatch.setattr(settings, "shared_state_path", tmp_path / "state.json")
+    assert not shared_state_service.is_leader
+    assert _observe_idle_channel(monkeypatch) == []